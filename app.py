@@ -1,19 +1,118 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string
 from flask_cors import CORS
 import json
 import os
 from datetime import datetime, timedelta
-import schedule
 import time
 import threading
+import random
+import math
+import re
+import base64
+import atexit
+import sqlite3
+import zlib
+import heapq
+import queue
+import smtplib
+import urllib.request
+from email.message import EmailMessage
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from collections import OrderedDict, deque
 from dateutil import parser
+from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY
+
+try:
+    # Optional faster JSON encoder for responses and snapshots
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 CORS(app)
 
+# Storage backend for events: 'json' (EVENTS_FILE) or 'sqlite' (SQLITE_FILE)
+STORAGE_BACKEND = 'json'
+
 # File to store events
 EVENTS_FILE = 'events.json'
 
+# Database used by the SQLite storage backend
+SQLITE_FILE = 'events.db'
+
+# Append mutations to a journal next to EVENTS_FILE instead of rewriting it,
+# folding the journal back into the snapshot once it reaches this many records
+JOURNAL_MODE = True
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# 'sync' persists each mutation before it is acknowledged; 'group' acknowledges
+# mutations once queued and a background flusher writes them in batches, every
+# GROUP_COMMIT_INTERVAL_MS milliseconds or GROUP_COMMIT_MAX_RECORDS records
+DURABILITY_MODE = 'sync'
+GROUP_COMMIT_INTERVAL_MS = 50
+GROUP_COMMIT_MAX_RECORDS = 500
+# A failed batch is retried with exponential backoff from the interval; after this
+# many attempts the storage is marked failed and flush() and close() raise
+GROUP_COMMIT_MAX_ATTEMPTS = 5
+
+# fsync every journal append or SQLite commit (or group commit batch) so it survives
+# power loss, not only a crash. Snapshot files are always fsynced before being installed
+FSYNC_COMMITS = False
+
+# Fall back to dateutil's heuristic parser for datetimes that are not ISO 8601
+FUZZY_DATETIME_FALLBACK = True
+
+# Recurring events are expanded lazily; this many (event, window) blocks of
+# occurrences are cached, each covering OCCURRENCE_WINDOW_DAYS of start times
+OCCURRENCE_CACHE_SIZE = 4096
+OCCURRENCE_WINDOW_DAYS = 7
+
+# Longest time window a range or upcoming request may cover, since recurring events
+# are expanded over the whole window
+MAX_QUERY_DAYS = 366
+
+# Search and upcoming results cached per store version. Upcoming results also move
+# with the clock, so they are reused for at most QUERY_CACHE_TTL seconds
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 1.0
+
+# JSON encodings of events and occurrences kept for assembling list responses
+FRAGMENT_CACHE_SIZE = 200000
+
+# Remind about each event this many minutes before it starts
+REMINDER_LEAD_MINUTES = 60
+
+# Reminder delivery. A sink is added for each destination that is configured;
+# REMINDER_SMTP takes host, port, sender and recipients keys
+REMINDER_CONSOLE = True
+REMINDER_LOG_FILE = None
+REMINDER_WEBHOOK_URL = None
+REMINDER_SMTP = None
+# Worker threads, queue capacity and largest batch per sink
+REMINDER_WORKERS = 2
+REMINDER_QUEUE_SIZE = 1000
+REMINDER_BATCH_SIZE = 50
+# Failed deliveries are retried after REMINDER_RETRY_BACKOFF seconds, doubling each time
+REMINDER_MAX_ATTEMPTS = 5
+REMINDER_RETRY_BACKOFF = 0.5
+
+# Serve listing, lookup and upcoming queries from copy-on-write snapshots instead of
+# taking the scheduler's read lock. Search, range and suggest queries still take it,
+# so they wait while a mutation changes the in-memory indexes
+SNAPSHOT_READS = True
+
+# Most recent mutations kept for delta sync (GET /api/events/changes)
+CHANGE_LOG_SIZE = 10000
+
+# Live change feed (GET /api/events/stream): messages buffered per client before it
+# is told to reload instead, seconds between keepalives, and most open streams
+STREAM_CLIENT_BUFFER = 256
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_MAX_CLIENTS = 100
+
 # HTML template for the web interface
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -174,7 +273,8 @@ HTML_TEMPLATE = """
         <div class="card">
             <h2>📋 Events List</h2>
             <div class="search-box">
-                <input type="text" id="searchInput" placeholder="Search events..." style="width: 70%;">
+                <input type="text" id="searchInput" list="titleSuggestions" placeholder="Search events..." style="width: 70%;">
+                <datalist id="titleSuggestions"></datalist>
                 <button onclick="searchEvents()">Search</button>
                 <button onclick="loadEvents()">Refresh</button>
             </div>
@@ -186,22 +286,88 @@ HTML_TEMPLATE = """
         <h2>🔧 API Endpoints</h2>
         <p>This system also provides a REST API for programmatic access:</p>
         <div class="endpoint">GET /api/health - Health check</div>
+        <div class="endpoint">GET /api/metrics - Reminder delivery metrics</div>
         <div class="endpoint">GET /api/events - Get all events</div>
         <div class="endpoint">POST /api/events - Create new event</div>
+        <div class="endpoint">POST /api/events/bulk - Create, update and delete many events</div>
         <div class="endpoint">GET /api/events/{id} - Get specific event</div>
         <div class="endpoint">PUT /api/events/{id} - Update event</div>
         <div class="endpoint">DELETE /api/events/{id} - Delete event</div>
-        <div class="endpoint">GET /api/events/search?q={query} - Search events</div>
+        <div class="endpoint">GET /api/events/search?q={query}&rank=bm25&limit={n} - Search events</div>
+        <div class="endpoint">GET /api/events/changes?since={version} - Changes since a store version</div>
+        <div class="endpoint">GET /api/events/stream - Live changes and reminders (server-sent events)</div>
+        <div class="endpoint">GET /api/events/suggest?prefix={prefix} - Suggest event titles</div>
         <div class="endpoint">GET /api/events/upcoming?hours={hours} - Get upcoming events</div>
+        <div class="endpoint">GET /api/events/range?start={start}&end={end} - Get events in a time window</div>
     </div>
 
     <script>
-        // Load events on page load
+        // Store version the list reflects, and the search it shows (null for all events)
+        let storeVersion = 0;
+        let currentQuery = null;
+        // Changes streamed while the list is loading, applied once it has loaded
+        let pendingChanges = null;
+
+        // Load events on page load, then follow changes as they happen
         document.addEventListener('DOMContentLoaded', function() {
             loadEvents();
             setCurrentDateTime();
+            document.getElementById('searchInput').addEventListener('input', suggestTitles);
+            followChanges();
         });
 
+        // Apply changes and show reminders pushed by /api/events/stream. EventSource
+        // reconnects by itself and the server replays anything missed meanwhile
+        function followChanges() {
+            const source = new EventSource('/api/events/stream');
+            source.addEventListener('put', e => applyChange('put', JSON.parse(e.data)));
+            source.addEventListener('delete', e => applyChange('delete', JSON.parse(e.data)));
+            source.addEventListener('resync', () => currentQuery === null ? loadEvents() : searchEvents());
+            source.addEventListener('reminder', e => {
+                const titles = JSON.parse(e.data).events.map(event => event.title);
+                showStatus('Reminder: ' + titles.join(', ') + ' starting soon', 'success');
+            });
+        }
+
+        function applyChange(op, change) {
+            if (pendingChanges) {
+                pendingChanges.push([op, change]);
+                return;
+            }
+            // Already included in the loaded list
+            if (change.version <= storeVersion) {
+                return;
+            }
+            storeVersion = change.version;
+            if (op === 'put') {
+                showEvent(change.event);
+            } else {
+                removeEvent(change.id);
+            }
+        }
+
+        // Offer matching titles while typing in the search box
+        function suggestTitles() {
+            const prefix = document.getElementById('searchInput').value;
+            if (!prefix) {
+                return;
+            }
+
+            fetch(`/api/events/suggest?prefix=${encodeURIComponent(prefix)}&limit=8`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    const options = document.getElementById('titleSuggestions');
+                    options.innerHTML = '';
+                    data.suggestions.forEach(title => {
+                        const option = document.createElement('option');
+                        option.value = title;
+                        options.appendChild(option);
+                    });
+                }
+            });
+        }
+
         // Set current datetime for form inputs
         function setCurrentDateTime() {
             const now = new Date();
@@ -238,7 +404,7 @@ HTML_TEMPLATE = """
                     showStatus('Event created successfully!', 'success');
                     document.getElementById('eventForm').reset();
                     setCurrentDateTime();
-                    loadEvents();
+                    showEvent(data.event);
                 } else {
                     showStatus('Error: ' + data.error, 'error');
                 }
@@ -250,16 +416,26 @@ HTML_TEMPLATE = """
 
         // Load all events
         function loadEvents() {
+            currentQuery = null;
+            pendingChanges = pendingChanges || [];
             fetch('/api/events')
-            .then(response => response.json())
-            .then(data => {
+            .then(response => {
+                const version = Number(response.headers.get('X-Store-Version'));
+                return response.json().then(data => [data, version]);
+            })
+            .then(([data, version]) => {
+                const changes = pendingChanges;
+                pendingChanges = null;
                 if (data.success) {
+                    storeVersion = version;
                     displayEvents(data.events);
+                    changes.forEach(([op, change]) => applyChange(op, change));
                 } else {
                     showStatus('Error loading events: ' + data.error, 'error');
                 }
             })
             .catch(error => {
+                pendingChanges = null;
                 showStatus('Error: ' + error.message, 'error');
             });
         }
@@ -267,13 +443,63 @@ HTML_TEMPLATE = """
         // Display events in the list
         function displayEvents(events) {
             const eventsList = document.getElementById('eventsList');
-            if (events.length === 0) {
-                eventsList.innerHTML = '<p>No events found.</p>';
+            eventsList.innerHTML = events.map(renderEvent).join('');
+            showIfEmpty();
+        }
+
+        function showIfEmpty() {
+            const eventsList = document.getElementById('eventsList');
+            const placeholder = document.getElementById('noEvents');
+            if (!eventsList.querySelector('.event-item')) {
+                eventsList.innerHTML = '<p id="noEvents">No events found.</p>';
+            } else if (placeholder) {
+                placeholder.remove();
+            }
+        }
+
+        // Add or replace one event in place. The full list is kept in start order;
+        // search results only follow the events they already show
+        function showEvent(event) {
+            const eventsList = document.getElementById('eventsList');
+            const existing = document.getElementById(`event-${event.id}`);
+            if (!existing && currentQuery !== null) {
+                return;
+            }
+            const template = document.createElement('template');
+            template.innerHTML = renderEvent(event).trim();
+            const item = template.content.firstChild;
+            if (currentQuery !== null) {
+                existing.replaceWith(item);
                 return;
             }
+            if (existing) {
+                existing.remove();
+            }
+            const start = startKey(event);
+            const next = Array.from(eventsList.querySelectorAll('.event-item')).find(other => {
+                const otherStart = Number(other.dataset.start);
+                return otherStart > start || (otherStart === start && Number(other.dataset.id) > event.id);
+            });
+            eventsList.insertBefore(item, next || null);
+            showIfEmpty();
+        }
 
-            eventsList.innerHTML = events.map(event => `
-                <div class="event-item">
+        function removeEvent(eventId) {
+            const existing = document.getElementById(`event-${eventId}`);
+            if (existing) {
+                existing.remove();
+                showIfEmpty();
+            }
+        }
+
+        // Events with an unparseable start time sort last
+        function startKey(event) {
+            return event.start_timestamp === null ? Infinity : event.start_timestamp;
+        }
+
+        function renderEvent(event) {
+            return `
+                <div class="event-item" id="event-${event.id}" data-id="${event.id}" data-start="${startKey(event)}">
                     <div class="event-title">${event.title}</div>
                     <div class="event-details">
                         <strong>Description:</strong> ${event.description}<br>
@@ -284,7 +510,7 @@ HTML_TEMPLATE = """
                     </div>
                     <button onclick="deleteEvent(${event.id})" style="background: #dc3545; margin-top: 10px;">Delete</button>
                 </div>
-            `).join('');
+            `;
         }
 
         // Search events
@@ -299,6 +525,7 @@ HTML_TEMPLATE = """
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
+                    currentQuery = query;
                     displayEvents(data.events);
                 } else {
                     showStatus('Error searching events: ' + data.error, 'error');
@@ -319,7 +546,7 @@ HTML_TEMPLATE = """
                 .then(data => {
                     if (data.success) {
                         showStatus('Event deleted successfully!', 'success');
-                        loadEvents();
+                        removeEvent(eventId);
                     } else {
                         showStatus('Error deleting event: ' + data.error, 'error');
                     }
@@ -349,37 +576,1481 @@ HTML_TEMPLATE = """
 </html>
 """
 
+def dumps_json(value, indent=False):
+    """Encode value as UTF-8 JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(value, indent=2 if indent else None, separators=None if indent else (',', ':'),
+                      ensure_ascii=False, default=str).encode()
+
+def parse_datetime(value):
+    """Parse an ISO 8601 datetime string, falling back to dateutil if enabled"""
+    if not isinstance(value, str):
+        raise TypeError('Datetime must be a string')
+    try:
+        if value.endswith('Z'):
+            # fromisoformat only accepts a 'Z' suffix from Python 3.11
+            return datetime.fromisoformat(value[:-1] + '+00:00')
+        return datetime.fromisoformat(value)
+    except ValueError:
+        if not FUZZY_DATETIME_FALLBACK:
+            raise
+        return parser.parse(value)
+
+# rrule frequency for each supported value of an event's recurring field
+RECURRENCE_FREQUENCIES = {'daily': DAILY, 'weekly': WEEKLY, 'monthly': MONTHLY}
+
+# Message for a recurring field that is neither null nor a frequency
+RECURRENCE_ERROR = f"recurring must be one of {', '.join(RECURRENCE_FREQUENCIES)} or null"
+
+def valid_recurrence(value):
+    """Whether value can be stored as an event's recurring field"""
+    # A string check first, as unhashable values cannot be looked up
+    return value is None or (isinstance(value, str) and value in RECURRENCE_FREQUENCIES)
+
+def is_recurring(event):
+    """Whether the event repeats and has valid start and end times to repeat"""
+    recurring = event.get('recurring')
+    return (isinstance(recurring, str) and recurring in RECURRENCE_FREQUENCIES
+            and event['start_timestamp'] is not None and event['end_timestamp'] is not None)
+
+def recurrence_rule(event, since=None):
+    """A lazy rrule of the recurring event's occurrence start times, and the parsed
+    first start, which fixes the series' time zone. Monthly events follow RFC 5545
+    and skip months without their day of the month.
+    
+    With since, the rule starts at that timestamp instead of the first start, so
+    expanding it never walks the occurrences before since. The weekday, day of the
+    month and time of the first start are spelled out to keep it on the same series"""
+    dtstart = parse_datetime(event['start_time'])
+    frequency = RECURRENCE_FREQUENCIES[event['recurring']]
+    fields = {'byhour': dtstart.hour, 'byminute': dtstart.minute, 'bysecond': dtstart.second}
+    if frequency == WEEKLY:
+        fields['byweekday'] = dtstart.weekday()
+    elif frequency == MONTHLY:
+        fields['bymonthday'] = dtstart.day
+    start = dtstart if since is None else max(dtstart, rule_datetime(dtstart, since))
+    return rrule(frequency, dtstart=start, **fields), dtstart
+
+def rule_datetime(dtstart, timestamp):
+    """A timestamp as a datetime comparable with a series' first start (naive times are
+    local), clamped to the range datetime can represent"""
+    try:
+        return datetime.fromtimestamp(timestamp, dtstart.tzinfo)
+    except (ValueError, OverflowError, OSError):
+        return (datetime.min if timestamp < 0 else datetime.max).replace(tzinfo=dtstart.tzinfo)
+
+def make_occurrence(event, start):
+    """The event as it occurs at the datetime start; the first occurrence is the event itself"""
+    timestamp = start.timestamp()
+    if timestamp == event['start_timestamp']:
+        return event
+    duration = event['end_timestamp'] - event['start_timestamp']
+    return {
+        **event,
+        'start_time': start.isoformat(),
+        'end_time': (start + timedelta(seconds=duration)).isoformat(),
+        'start_timestamp': timestamp,
+        'end_timestamp': timestamp + duration
+    }
+
+def next_occurrence(event, after):
+    """The first occurrence of the event starting strictly after the timestamp, or None"""
+    if not is_recurring(event):
+        start = event['start_timestamp']
+        return event if start is not None and start > after else None
+    rule, dtstart = recurrence_rule(event, since=after)
+    start = rule.after(rule_datetime(dtstart, after))
+    return None if start is None else make_occurrence(event, start)
+
+class OccurrenceCache:
+    """LRU cache of recurring events' occurrences, materialized one fixed window of
+    start times at a time so that no series is expanded further than queried"""
+    
+    def __init__(self, capacity=OCCURRENCE_CACHE_SIZE, window=OCCURRENCE_WINDOW_DAYS * 86400):
+        self.capacity = capacity
+        self.window = window
+        self._lock = threading.Lock()
+        # (event id, window index) -> (event, occurrences starting in the window)
+        self._entries = OrderedDict()
+        # Event id -> indexes of its cached windows
+        self._windows = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def occurrences(self, event, low, high):
+        """Occurrences of the recurring event starting in [low, high], in start order"""
+        result = []
+        for index in range(int(low // self.window), int(high // self.window) + 1):
+            result.extend(occurrence for occurrence in self._window(event, index)
+                          if low <= occurrence['start_timestamp'] <= high)
+        return result
+    
+    def _window(self, event, index):
+        key = (event['id'], index)
+        with self._lock:
+            entry = self._entries.get(key)
+            # Entries for another version of the event are stale
+            if entry is not None and entry[0] is event:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        low, high = index * self.window, (index + 1) * self.window
+        rule, dtstart = recurrence_rule(event, since=low)
+        occurrences = tuple(make_occurrence(event, start)
+                            for start in rule.between(rule_datetime(dtstart, low), rule_datetime(dtstart, high), inc=True)
+                            if start.timestamp() < high)
+        with self._lock:
+            self._entries[key] = (event, occurrences)
+            self._entries.move_to_end(key)
+            self._windows.setdefault(event['id'], set()).add(index)
+            while len(self._entries) > self.capacity:
+                (event_id, evicted), _ = self._entries.popitem(last=False)
+                self._forget(event_id, evicted)
+                self.evictions += 1
+        return occurrences
+    
+    def _forget(self, event_id, index):
+        indexes = self._windows[event_id]
+        indexes.discard(index)
+        if not indexes:
+            del self._windows[event_id]
+    
+    def invalidate(self, event_id):
+        """Drop the cached occurrences of an updated or deleted event"""
+        with self._lock:
+            for index in self._windows.pop(event_id, ()):
+                del self._entries[(event_id, index)]
+    
+    def metrics(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class FragmentCache:
+    """LRU cache of event JSON encodings for assembling list responses. Entries are
+    keyed by event id and start time, so each cached occurrence of a recurring event
+    has its own, and are served only for the very object they were encoded from.
+    A reader that raced an update may store an encoding of the old object; it is
+    never served for the new one and ages out like any other entry"""
+    
+    def __init__(self, capacity=FRAGMENT_CACHE_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # (event id, start timestamp) -> (event, its JSON encoding)
+        self._entries = OrderedDict()
+        # Event id -> start timestamps of its cached entries
+        self._starts = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def encode(self, event):
+        """The event encoded as JSON bytes"""
+        key = (event['id'], event['start_timestamp'])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is event:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        fragment = dumps_json(event)
+        with self._lock:
+            self._entries[key] = (event, fragment)
+            self._entries.move_to_end(key)
+            self._starts.setdefault(key[0], set()).add(key[1])
+            while len(self._entries) > self.capacity:
+                (event_id, start), _ = self._entries.popitem(last=False)
+                self._forget(event_id, start)
+                self.evictions += 1
+        return fragment
+    
+    def _forget(self, event_id, start):
+        starts = self._starts[event_id]
+        starts.discard(start)
+        if not starts:
+            del self._starts[event_id]
+    
+    def invalidate(self, event_id):
+        """Drop the encodings of an updated or deleted event and its occurrences"""
+        with self._lock:
+            for start in self._starts.pop(event_id, ()):
+                del self._entries[(event_id, start)]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._starts.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def metrics(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class RecurringIndex:
+    """Recurring events by id, and their first starts in order so queries can skip
+    series that begin after their window. A published index is never changed:
+    writers change a copy, once per mutation, and publish it when they are done, so
+    lock-free readers can hold on to it"""
+    
+    def __init__(self, events=None, starts=None):
+        # Event id -> event
+        self.events = {} if events is None else events
+        # Sorted (first start timestamp, event id)
+        self.starts = [] if starts is None else starts
+        # Longest occurrence, for occurrences that start before a window but overlap it
+        self.longest = 0
+    
+    def __contains__(self, event_id):
+        return event_id in self.events
+    
+    def copy(self):
+        return RecurringIndex(dict(self.events), list(self.starts))
+    
+    def add(self, event):
+        self.events[event['id']] = event
+        insort(self.starts, (event['start_timestamp'], event['id']))
+    
+    def remove(self, event):
+        del self.events[event['id']]
+        del self.starts[bisect_left(self.starts, (event['start_timestamp'], event['id']))]
+    
+    def seal(self):
+        """Compute the derived fields of a finished index before publishing it"""
+        self.longest = max((event['end_timestamp'] - event['start_timestamp'] for event in self.events.values()),
+                           default=0)
+        return self
+    
+    def starting_by(self, high):
+        """The series whose first occurrence starts at or before high"""
+        end = bisect_right(self.starts, (high, float('inf')))
+        return [self.events[event_id] for _, event_id in self.starts[:end]]
+
+class QueryCache:
+    """LRU cache of query results, each tagged with the store version it was computed
+    at and served only at that version, so any mutation invalidates every entry.
+    Results that depend on the time can also be given an expiry time"""
+    
+    def __init__(self, capacity=QUERY_CACHE_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # Normalized query -> (version, expiry time or None, results)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key, version, now=None):
+        """A copy of the results cached for key at version, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and (entry[1] is None or now < entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[2])
+            self.misses += 1
+            return None
+    
+    def put(self, key, version, results, expires=None):
+        with self._lock:
+            self._entries[key] = (version, expires, tuple(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def metrics(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class IntervalTree:
+    """Balanced search tree (treap) of intervals keyed by (start, id) and
+    augmented with the maximum end time of each subtree"""
+    
+    class _Node:
+        __slots__ = ('key', 'end', 'max_end', 'priority', 'left', 'right')
+        
+        def __init__(self, key, end):
+            self.key = key
+            self.end = end
+            self.max_end = end
+            self.priority = random.random()
+            self.left = None
+            self.right = None
+        
+        def update(self):
+            self.max_end = self.end
+            if self.left is not None and self.left.max_end > self.max_end:
+                self.max_end = self.left.max_end
+            if self.right is not None and self.right.max_end > self.max_end:
+                self.max_end = self.right.max_end
+    
+    def __init__(self):
+        self._root = None
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def _split(self, node, key, inclusive):
+        """Split into keys below key (or up to key if inclusive) and the rest"""
+        if node is None:
+            return None, None
+        if node.key < key or (inclusive and node.key == key):
+            node.right, right = self._split(node.right, key, inclusive)
+            node.update()
+            return node, right
+        left, node.left = self._split(node.left, key, inclusive)
+        node.update()
+        return left, node
+    
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
+    
+    @classmethod
+    def build(cls, intervals):
+        """Build a tree from (start, end, id) intervals sorted by (start, id) in linear
+        time, as a Cartesian tree over the same random priorities insert() would use"""
+        tree = cls()
+        # Right spine of the tree built so far, root first
+        spine = []
+        for start, end, item_id in intervals:
+            node = cls._Node((start, item_id), end)
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+                last.update()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        while spine:
+            tree._root = spine.pop()
+            tree._root.update()
+        tree._size = len(intervals)
+        return tree
+    
+    def insert(self, start, end, item_id):
+        """Insert the interval [start, end) for item_id"""
+        key = (start, item_id)
+        left, right = self._split(self._root, key, inclusive=False)
+        self._root = self._merge(self._merge(left, self._Node(key, end)), right)
+        self._size += 1
+    
+    def remove(self, start, item_id):
+        """Remove the interval for item_id if present"""
+        key = (start, item_id)
+        left, right = self._split(self._root, key, inclusive=False)
+        middle, right = self._split(right, key, inclusive=True)
+        if middle is not None:
+            self._size -= 1
+        self._root = self._merge(left, right)
+    
+    def overlapping(self, low, high):
+        """Ids of intervals overlapping [low, high), ordered by start"""
+        result = []
+        self._collect_overlapping(self._root, low, high, result)
+        return result
+    
+    def _collect_overlapping(self, node, low, high, result):
+        if node is None or node.max_end <= low:
+            return
+        self._collect_overlapping(node.left, low, high, result)
+        if node.key[0] >= high:
+            # This node and its right subtree start after the window
+            return
+        if node.end > low:
+            result.append(node.key[1])
+        self._collect_overlapping(node.right, low, high, result)
+    
+    def starting_between(self, low, high, after=None, limit=None):
+        """Ids of intervals whose start lies in [low, high], ordered by start.
+        Resumes after the (start, id) key after and stops at limit results"""
+        lower = (low, -math.inf)
+        if after is not None and after > lower:
+            lower = after
+        result = []
+        self._collect_starting(self._root, lower, high, limit, result)
+        return result
+    
+    def _collect_starting(self, node, lower, high, limit, result):
+        if node is None or len(result) == limit:
+            return
+        if node.key > lower:
+            self._collect_starting(node.left, lower, high, limit, result)
+            if len(result) == limit or node.key[0] > high:
+                return
+            result.append(node.key[1])
+        self._collect_starting(node.right, lower, high, limit, result)
+
+class TitleIndex:
+    """Sorted (key, title) pairs answering prefix lookups on lowercase keys with bisect.
+    
+    A pair is held once for each event indexed with it, so removing one event's
+    pairs leaves those of other events with the same title.
+    """
+    
+    def __init__(self, pairs=()):
+        self._pairs = sorted(pairs)
+    
+    def insert(self, key, title):
+        insort(self._pairs, (key, title))
+    
+    def remove(self, key, title):
+        position = bisect_left(self._pairs, (key, title))
+        if position < len(self._pairs) and self._pairs[position] == (key, title):
+            del self._pairs[position]
+    
+    def titles_with_prefix(self, prefix, limit=10):
+        """Distinct titles stored under keys starting with prefix, in key order"""
+        results = []
+        seen = set()
+        for position in range(bisect_left(self._pairs, (prefix,)), len(self._pairs)):
+            if len(results) == limit:
+                break
+            key, title = self._pairs[position]
+            if not key.startswith(prefix):
+                break
+            if title not in seen:
+                seen.add(title)
+                results.append(title)
+        return results
+
+class EventStorage(ABC):
+    """Interface between EventScheduler and where its events are persisted.
+    
+    Mutations are passed to commit() as records: {'op': 'put', 'event': {...}}
+    for a created or updated event and {'op': 'delete', 'id': ...} for a delete.
+    """
+    
+    @abstractmethod
+    def load(self):
+        """Return (events, next_id) from storage"""
+    
+    @abstractmethod
+    def save(self, document):
+        """Replace everything stored with a {'next_id': ..., 'events': [...]} document"""
+    
+    @abstractmethod
+    def commit(self, records, state):
+        """Persist mutation records. state() returns the full current document
+        for backends that cannot apply records incrementally"""
+    
+    def close(self):
+        """Release any open files or connections"""
+
+class ReadWriteLock:
+    """Lock that admits many concurrent readers or a single writer.
+    Waiting writers hold back new readers so a stream of reads cannot starve them.
+    Neither side is reentrant."""
+    
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+class CorruptSnapshotError(Exception):
+    """A snapshot file that cannot be parsed or fails its checksum"""
+
+class JSONFileStorage(EventStorage):
+    """Events kept in a JSON snapshot file, optionally with an append-only journal
+    of mutations that is folded back into the snapshot in the background.
+    
+    Snapshots are written to a temporary file, fsynced and renamed over the old
+    one, which is kept as a backup. Each snapshot starts with a CRC-32 of the rest
+    of the document, and loading falls back to the backup if the snapshot is
+    unreadable or fails the check.
+    
+    A rotated journal starts with a base record naming the checksum of the
+    snapshot it continues. After compaction it is kept as the backup journal, so
+    the backup snapshot plus that journal still rebuild the current state. In
+    journal mode a fallback that no journal continues is refused instead of
+    silently dropping the compacted mutations."""
+    
+    # Written before the rest of the document so it can be checked without re-serializing
+    CHECKSUM_HEADER = re.compile(r'\{"checksum": "([0-9a-f]{8})",')
+    
+    def __init__(self, events_file, journal=False, compact_threshold=JOURNAL_COMPACT_THRESHOLD, fsync=False):
+        self.events_file = events_file
+        self.journal = journal
+        self.fsync = fsync
+        self.journal_file = events_file + '.log'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._journal_handle = None
+        self._journal_records = 0
+        # Bumped by save() so a compaction started before it is discarded
+        self._generation = 0
+        self._compaction_thread = None
+        # Checksum of the current snapshot, recorded as the base of the next rotated journal
+        self._checksum = None
+    
+    def _rotated_journal_file(self):
+        return self.journal_file + '.1'
+    
+    def _backup_journal_file(self):
+        """The journal last folded into the snapshot, which continues the backup"""
+        return self.journal_file + '.0'
+    
+    def _backup_file(self):
+        return self.events_file + '.bak'
+    
+    @classmethod
+    def _parse_snapshot(cls, text):
+        """Parse snapshot text, verifying its checksum if it has one"""
+        header = cls.CHECKSUM_HEADER.match(text)
+        if header:
+            body = '{' + text[header.end():]
+            if f'{zlib.crc32(body.encode()):08x}' != header.group(1):
+                raise CorruptSnapshotError('checksum mismatch')
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise CorruptSnapshotError(str(e))
+    
+    def _read_snapshot(self):
+        """Read the snapshot document, accepting the legacy bare list format.
+        Falls back to the backup of the previous snapshot if the current one is
+        corrupt, and raises CorruptSnapshotError rather than starting empty if
+        neither is usable. Returns the document, the checksum of the file read,
+        and the errors that forced a fallback, if any"""
+        data = []
+        checksum = None
+        errors = []
+        for path in (self.events_file, self._backup_file()):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    text = file.read()
+                if not text:
+                    # Created but never written
+                    continue
+                data = self._parse_snapshot(text)
+                header = self.CHECKSUM_HEADER.match(text)
+                checksum = header and header.group(1)
+            except (CorruptSnapshotError, UnicodeDecodeError) as e:
+                errors.append(f'{path}: {e}')
+                continue
+            if errors:
+                print(f"Recovered from the last good snapshot {path} ({'; '.join(errors)})")
+            break
+        else:
+            if errors:
+                raise CorruptSnapshotError('; '.join(errors))
+        
+        if isinstance(data, dict):
+            document = {'next_id': data.get('next_id', 1), 'events': data.get('events', [])}
+        else:
+            # Legacy snapshot: a bare list of events
+            document = {'next_id': 1, 'events': data}
+        return document, checksum, '; '.join(errors)
+    
+    def _read_state(self, journals):
+        """Read the snapshot and replay the journals over it in order. A journal
+        with a base record is skipped unless it continues the snapshot read or an
+        earlier journal that was replayed; journals without one are always
+        replayed. Returns the document, the checksum of the snapshot read and the
+        number of records replayed from the last journal"""
+        document, checksum, errors = self._read_snapshot()
+        events_by_id = {event['id']: event for event in document['events']}
+        bridged = False
+        records = 0
+        for path in journals:
+            records = 0
+            for record in self._read_journal(path):
+                if record['op'] == 'base':
+                    if not bridged and record['checksum'] != checksum:
+                        break
+                    bridged = True
+                    continue
+                self._apply(document, events_by_id, record)
+                records += 1
+        if errors and not bridged:
+            # The backup predates the compactions or saves since, and nothing replays them
+            raise CorruptSnapshotError(f'{errors}; no journal continues the backup snapshot')
+        document['events'] = list(events_by_id.values())
+        return document, checksum, records
+    
+    @staticmethod
+    def _read_journal(path):
+        """Yield the records of a journal file, stopping at a torn final line"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append, possibly cut
+                    # inside a UTF-8 sequence
+                    return
+                yield record
+    
+    @staticmethod
+    def _apply(document, events_by_id, record):
+        if record['op'] == 'put':
+            event_id = record['event']['id']
+            events_by_id[event_id] = record['event']
+            document['next_id'] = max(document['next_id'], event_id + 1)
+        elif record['op'] == 'delete':
+            events_by_id.pop(record['id'], None)
+    
+    def load(self):
+        """Load the snapshot, replaying the journal if enabled"""
+        with self._lock:
+            if self.journal:
+                document, self._checksum, self._journal_records = self._read_state(
+                    (self._backup_journal_file(), self._rotated_journal_file(), self.journal_file)
+                )
+            else:
+                document, self._checksum, _ = self._read_snapshot()
+            return document['events'], document['next_id']
+    
+    def save(self, document):
+        with self._lock:
+            self._generation += 1
+            self._write_snapshot(document, self.events_file + '.tmp')
+            if self.journal:
+                self._truncate_journal()
+    
+    def _write_snapshot(self, document, tmp_file):
+        """Write a full snapshot document via a temporary file"""
+        self._install_snapshot(tmp_file, self._dump_snapshot(document, tmp_file))
+    
+    @staticmethod
+    def _dump_snapshot(document, tmp_file):
+        """Write a checksummed snapshot to tmp_file and fsync it. Returns the checksum"""
+        body = dumps_json({'next_id': document['next_id'], 'events': document['events']}, indent=True)
+        checksum = f'{zlib.crc32(body):08x}'
+        with open(tmp_file, 'wb') as file:
+            file.write(b'{"checksum": "%s",' % checksum.encode() + body[1:])
+            file.flush()
+            os.fsync(file.fileno())
+        return checksum
+    
+    def _install_snapshot(self, tmp_file, checksum):
+        """Atomically replace the snapshot with tmp_file, keeping the old one as the backup"""
+        self._checksum = checksum
+        if os.path.exists(self.events_file):
+            os.replace(self.events_file, self._backup_file())
+        os.replace(tmp_file, self.events_file)
+        if hasattr(os, 'O_DIRECTORY'):
+            # Make the renames themselves durable
+            directory = os.open(os.path.dirname(os.path.abspath(self.events_file)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+    
+    def _close_journal(self):
+        if self._journal_handle is not None:
+            self._journal_handle.close()
+            self._journal_handle = None
+    
+    def _truncate_journal(self):
+        """Drop all journal records; the caller must hold the lock"""
+        self._close_journal()
+        for path in (self._backup_journal_file(), self._rotated_journal_file(), self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self._journal_records = 0
+    
+    def commit(self, records, state):
+        """Append records to the journal, or rewrite the snapshot without one"""
+        with self._lock:
+            if not self.journal:
+                self._write_snapshot(state(), self.events_file + '.tmp')
+                return
+            
+            if self._journal_handle is None:
+                self._journal_handle = open(self.journal_file, 'ab')
+            self._journal_handle.write(b''.join(dumps_json(record) + b'\n' for record in records))
+            self._journal_handle.flush()
+            if self.fsync:
+                os.fsync(self._journal_handle.fileno())
+            self._journal_records += len(records)
+            
+            if self._journal_records >= self.compact_threshold and self._compaction_thread is None:
+                self._rotate_journal()
+                self._compaction_thread = threading.Thread(
+                    target=self._compact, args=(self._generation,), daemon=True
+                )
+                self._compaction_thread.start()
+    
+    def _rotate_journal(self):
+        """Move the live journal aside for compaction; the caller must hold the lock"""
+        self._close_journal()
+        # Appends if a previous compaction did not finish, keeping its records and base too
+        with open(self.journal_file, 'rb') as src, open(self._rotated_journal_file(), 'ab') as dst:
+            if dst.tell() == 0:
+                dst.write(dumps_json({'op': 'base', 'checksum': self._checksum}) + b'\n')
+            dst.write(src.read())
+            dst.flush()
+            if self.fsync:
+                os.fsync(dst.fileno())
+        os.remove(self.journal_file)
+        self._journal_records = 0
+    
+    def _compact(self, generation):
+        """Fold the rotated journal into a new snapshot"""
+        try:
+            # Only compaction replaces the snapshot without bumping the generation,
+            # so the snapshot and journals are stable while they are read
+            document, _, _ = self._read_state((self._backup_journal_file(), self._rotated_journal_file()))
+            
+            tmp_file = self.events_file + '.compact'
+            checksum = self._dump_snapshot(document, tmp_file)
+            with self._lock:
+                if generation != self._generation:
+                    # save() replaced everything while this compaction ran
+                    os.remove(tmp_file)
+                    return
+                self._install_snapshot(tmp_file, checksum)
+                # The old snapshot is now the backup, and this journal continues it
+                os.replace(self._rotated_journal_file(), self._backup_journal_file())
+        finally:
+            # commit() checks this under the lock before starting another compaction
+            with self._lock:
+                self._compaction_thread = None
+    
+    def wait_for_compaction(self, timeout=None):
+        """Block until a running background compaction has finished"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def close(self):
+        with self._lock:
+            self._close_journal()
+
+class SQLiteStorage(EventStorage):
+    """Events kept in an SQLite database in WAL mode, one row per event. Like the
+    JSON backend it is read in full at startup; queries are answered from the
+    scheduler's in-memory indexes, so the database keeps no indexes of its own"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        );
+    """
+    
+    def __init__(self, db_file, fsync=False):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # NORMAL only syncs the WAL at checkpoints; FULL syncs it on every commit
+        self._connection.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._connection.executescript(self.SCHEMA)
+    
+    def load(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT data FROM events ORDER BY id').fetchall()
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        return [json.loads(data) for data, in rows], row[0] if row else 1
+    
+    def save(self, document):
+        with self._lock:
+            with self._transaction():
+                self._connection.execute('DELETE FROM events')
+                for event in document['events']:
+                    self._put(event)
+                self._set_next_id(document['next_id'])
+    
+    def commit(self, records, state):
+        """Apply all records in a single transaction"""
+        with self._lock:
+            with self._transaction():
+                next_id = None
+                for record in records:
+                    if record['op'] == 'put':
+                        self._put(record['event'])
+                        next_id = max(next_id or 0, record['event']['id'] + 1)
+                    elif record['op'] == 'delete':
+                        self._connection.execute('DELETE FROM events WHERE id = ?', (record['id'],))
+                if next_id is not None:
+                    self._connection.execute(
+                        "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+                        "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                        (next_id,)
+                    )
+    
+    @contextmanager
+    def _transaction(self):
+        self._connection.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+    
+    def _put(self, event):
+        self._connection.execute(
+            'INSERT INTO events (id, data) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET data = excluded.data',
+            (event['id'], dumps_json(event).decode())
+        )
+    
+    def _set_next_id(self, next_id):
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (next_id,)
+        )
+    
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class GroupCommitStorage(EventStorage):
+    """Wraps another backend so commits return once queued. A background flusher
+    hands the queued records to the wrapped backend as one batch every interval
+    seconds, or sooner once max_records are waiting. A batch the backend rejects
+    is retried with a doubling delay; after max_attempts failures in a row the
+    flusher stops and the error is raised from commit(), flush() and close()"""
+    
+    def __init__(self, storage, interval=GROUP_COMMIT_INTERVAL_MS / 1000, max_records=GROUP_COMMIT_MAX_RECORDS,
+                 max_attempts=GROUP_COMMIT_MAX_ATTEMPTS):
+        self.storage = storage
+        self.events_file = getattr(storage, 'events_file', None)
+        self.interval = interval
+        self.max_records = max_records
+        self.max_attempts = max_attempts
+        self._condition = threading.Condition()
+        self._pending = []
+        # state() of the latest commit, for backends that rewrite the whole document
+        self._state = None
+        self._flushing = False
+        self._flush_requested = False
+        self._closed = False
+        # The last write error, once the flusher has given up
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def load(self):
+        self.flush()
+        return self.storage.load()
+    
+    def save(self, document):
+        self.flush()
+        self.storage.save(document)
+    
+    def commit(self, records, state):
+        """Queue records for the next batch"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Storage is closed')
+            self._raise_if_failed()
+            # Wake the flusher to start a batch, or to write a full one early
+            if not self._pending or len(self._pending) + len(records) >= self.max_records:
+                self._condition.notify_all()
+            self._pending.extend(records)
+            self._state = state
+    
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f'Group commit stopped after {self.max_attempts} failed writes: {self._error}') from self._error
+    
+    def _run(self):
+        attempts = 0
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Give a burst of writes the interval to fill the batch
+                deadline = time.monotonic() + self.interval
+                while len(self._pending) < self.max_records and not (self._closed or self._flush_requested):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                records, state = self._pending, self._state
+                self._pending = []
+                self._flushing = True
+            try:
+                self.storage.commit(records, state)
+                attempts = 0
+            except Exception as e:
+                attempts += 1
+                print(f"Error writing {len(records)} queued records (attempt {attempts}): {e}")
+                with self._condition:
+                    # Keep the records, ahead of any queued since
+                    self._pending[:0] = records
+                    if attempts >= self.max_attempts:
+                        self._error = e
+                    else:
+                        # Back off before retrying; flush() and commit() notifications don't cut it short
+                        deadline = time.monotonic() + self.interval * 2 ** attempts
+                        while True:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            self._condition.wait(remaining)
+            finally:
+                with self._condition:
+                    self._flushing = False
+                    self._condition.notify_all()
+            if self._error is not None:
+                return
+    
+    def flush(self):
+        """Block until every queued record has been written, or raise if the
+        flusher gave up on them"""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while (self._pending or self._flushing) and self._error is None:
+                self._condition.wait()
+            self._flush_requested = False
+            self._raise_if_failed()
+    
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            self._thread.join()
+            self.storage.close()
+
+def create_storage(backend=None):
+    """Build the storage backend selected by STORAGE_BACKEND, wrapped for group
+    commit when DURABILITY_MODE is 'group'"""
+    backend = backend or STORAGE_BACKEND
+    if backend == 'json':
+        storage = JSONFileStorage(EVENTS_FILE, journal=JOURNAL_MODE, fsync=FSYNC_COMMITS)
+    elif backend == 'sqlite':
+        storage = SQLiteStorage(SQLITE_FILE, fsync=FSYNC_COMMITS)
+    else:
+        raise ValueError(f'Unknown storage backend: {backend}')
+    if DURABILITY_MODE == 'group':
+        storage = GroupCommitStorage(storage)
+    elif DURABILITY_MODE != 'sync':
+        raise ValueError(f'Unknown durability mode: {DURABILITY_MODE}')
+    return storage
+
+class EventSnapshot:
+    """Immutable view of all events at one point in time.
+    
+    Events are held in (start key, id) order as a tuple of small sorted chunks,
+    and by id in buckets of consecutive ids. Deriving the next snapshot copies
+    one chunk, one bucket and the two short tuples that index them; everything
+    else is shared with the previous snapshot.
+    """
+    
+    CHUNK_SIZE = 256
+    BUCKET_BITS = 8
+    
+    __slots__ = ('_chunks', '_maxes', '_buckets', '_size')
+    
+    def __init__(self, chunks=(), maxes=(), buckets=(), size=0):
+        # Each chunk is a (keys, events) pair of equal-length tuples
+        self._chunks = chunks
+        # Last key of each chunk, for bisecting to the right chunk
+        self._maxes = maxes
+        # Bucket i maps the ids in [i << BUCKET_BITS, (i + 1) << BUCKET_BITS) to events
+        self._buckets = buckets
+        self._size = size
+    
+    @classmethod
+    def build(cls, keyed_events):
+        """Build a snapshot from (key, event) pairs sorted by key"""
+        chunks = []
+        for i in range(0, len(keyed_events), cls.CHUNK_SIZE):
+            part = keyed_events[i:i + cls.CHUNK_SIZE]
+            chunks.append((tuple(key for key, _ in part), tuple(event for _, event in part)))
+        buckets = []
+        for _, event in keyed_events:
+            index = event['id'] >> cls.BUCKET_BITS
+            while len(buckets) <= index:
+                buckets.append({})
+            buckets[index][event['id']] = event
+        return cls(tuple(chunks), tuple(keys[-1] for keys, _ in chunks), tuple(buckets), len(keyed_events))
+    
+    def __len__(self):
+        return self._size
+    
+    def get(self, event_id):
+        """The event with this id, or None"""
+        index = event_id >> self.BUCKET_BITS
+        if 0 <= index < len(self._buckets):
+            return self._buckets[index].get(event_id)
+        return None
+    
+    def _with_bucket(self, event_id, event):
+        index = event_id >> self.BUCKET_BITS
+        buckets = self._buckets
+        if index >= len(buckets):
+            buckets += ({},) * (index + 1 - len(buckets))
+        bucket = dict(buckets[index])
+        if event is None:
+            del bucket[event_id]
+        else:
+            bucket[event_id] = event
+        return buckets[:index] + (bucket,) + buckets[index + 1:]
+    
+    def _with_chunks(self, index, replacement):
+        """Replace chunk index with zero or more chunks"""
+        chunks = self._chunks[:index] + tuple(replacement) + self._chunks[index + 1:]
+        maxes = self._maxes[:index] + tuple(keys[-1] for keys, _ in replacement) + self._maxes[index + 1:]
+        return chunks, maxes
+    
+    def with_event(self, key, event):
+        """A new snapshot that also holds event under key"""
+        if not self._chunks:
+            chunks, maxes = (((key,), (event,)),), (key,)
+        else:
+            index = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+            keys, events = self._chunks[index]
+            position = bisect_left(keys, key)
+            keys = keys[:position] + (key,) + keys[position:]
+            events = events[:position] + (event,) + events[position:]
+            if len(keys) > 2 * self.CHUNK_SIZE:
+                half = len(keys) // 2
+                replacement = [(keys[:half], events[:half]), (keys[half:], events[half:])]
+            else:
+                replacement = [(keys, events)]
+            chunks, maxes = self._with_chunks(index, replacement)
+        return EventSnapshot(chunks, maxes, self._with_bucket(event['id'], event), self._size + 1)
+    
+    def without_event(self, key):
+        """A new snapshot without the event stored under key"""
+        index = bisect_left(self._maxes, key)
+        keys, events = self._chunks[index]
+        position = bisect_left(keys, key)
+        keys = keys[:position] + keys[position + 1:]
+        events = events[:position] + events[position + 1:]
+        chunks, maxes = self._with_chunks(index, [(keys, events)] if keys else [])
+        return EventSnapshot(chunks, maxes, self._with_bucket(key[1], None), self._size - 1)
+    
+    def iter_events(self, start=None, end=None, after=None, limit=None):
+        """Yield events in key order, limited to start keys in [start, end],
+        resuming after the key after, up to limit events"""
+        lower = (-math.inf,) if start is None else (start,)
+        if after is not None and tuple(after) >= lower:
+            lower = tuple(after)
+            find = bisect_right
+        else:
+            find = bisect_left
+        upper = (math.inf if end is None else end, math.inf)
+        
+        yielded = 0
+        for keys, events in self._chunks[bisect_left(self._maxes, lower):]:
+            position = find(keys, lower)
+            for key, event in zip(keys[position:], events[position:]):
+                if key > upper or yielded == limit:
+                    return
+                yielded += 1
+                yield event
+
+class ChangesUnavailable(Exception):
+    """Changes since a version are no longer, or were never, in the change log"""
+
 class EventScheduler:
-    def __init__(self, events_file=None):
-        self.events_file = events_file or EVENTS_FILE
+    # Events read from the start order index per step of iter_events_by_start
+    ITER_CHUNK_SIZE = 512
+    
+    # BM25 ranking parameters
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    
+    def __init__(self, events_file=None, journal=False, compact_threshold=JOURNAL_COMPACT_THRESHOLD, storage=None,
+                 snapshot_reads=False):
+        if storage is None:
+            storage = JSONFileStorage(events_file or EVENTS_FILE, journal=journal, compact_threshold=compact_threshold)
+        self.storage = storage
+        self.events_file = getattr(storage, 'events_file', None)
+        # Readers share the lock; mutations take it exclusively while they change the
+        # in-memory indexes
+        self._lock = ReadWriteLock()
+        # Serializes storage commits, which run after the write lock is released, in
+        # mutation order
+        self._commit_lock = threading.Lock()
+        # Persistent id sequence; ids are never reused, even after deletes
+        self._next_id = 1
+        # With snapshot reads, listing, lookups and upcoming queries read an immutable
+        # snapshot that writers replace instead of taking the read lock
+        self.snapshot_reads = snapshot_reads
+        self._snapshot = EventSnapshot()
+        # Odd while the in-memory indexes are being changed; each mutation adds two
+        self._sequence = 0
+        # Tells this process's store versions apart from those of an earlier run
+        self.instance_id = os.urandom(4).hex()
+        # (version, event id, event or None if deleted) for recent mutations
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)
+        # Changes at or before this version may be missing from the log
+        self._changes_floor = 0
+        self._listeners = []
+        # Expanded occurrences of recurring events
+        self._occurrences = OccurrenceCache()
+        # JSON encodings of events for assembling list responses
+        self._fragments = FragmentCache()
+        # Recent search and upcoming results
+        self._queries = QueryCache()
+        # Recurring events, and the copy a mutation is changing, if any
+        self._recurring = RecurringIndex()
+        self._recurring_draft = None
         self.events = []
         self.load_events()
     
-    def load_events(self):
-        """Load events from JSON file"""
-        if os.path.exists(self.events_file):
-            try:
-                with open(self.events_file, 'r') as file:
-                    self.events = json.load(file)
-            except json.JSONDecodeError:
-                self.events = []
+    @property
+    def events(self):
+        """All events in storage order"""
+        return self._events
+    
+    @events.setter
+    def events(self, events):
+        with self._lock.write():
+            with self._mutation():
+                self._events = list(events)
+                self._rebuild_indexes()
+            self._notify('reset')
+    
+    @property
+    def version(self):
+        """Store version, bumped by every mutation. Read it before reading events, so
+        that a version never labels data older than itself"""
+        return self._sequence // 2
+    
+    @contextmanager
+    def _writing(self):
+        """Hold the write lock for the body, which appends the storage records of its
+        mutations to the yielded list. The records are committed once the write lock
+        is released, so reads never wait for storage I/O; the commit lock, taken
+        before the write lock is released, keeps commits in mutation order"""
+        records = []
+        with self._lock.write():
+            yield records
+            self._commit_lock.acquire()
+        try:
+            if records:
+                self.storage.commit(records, self._snapshot_document)
+        finally:
+            self._commit_lock.release()
+    
+    @contextmanager
+    def _mutation(self, records=None):
+        """Mark the indexes as changing for readers that validate against the sequence,
+        such as the query cache; the caller must hold the write lock. Given the
+        storage records list, a body that completes without appending to it changed
+        nothing, and the version is left as it was"""
+        self._sequence += 1
+        recorded = None if records is None else len(records)
+        try:
+            yield
+        except BaseException:
+            recorded = None
+            raise
+        finally:
+            if self._recurring_draft is not None:
+                self._recurring = self._recurring_draft.seal()
+                self._recurring_draft = None
+            self._sequence += -1 if recorded is not None and len(records) == recorded else 1
+    
+    def _changing_recurring(self):
+        """The recurring index being changed by this mutation, copied from the
+        published one on first use; the caller must hold the write lock inside a mutation"""
+        if self._recurring_draft is None:
+            self._recurring_draft = self._recurring.copy()
+        return self._recurring_draft
+    
+    def add_listener(self, listener, initial=None):
+        """Call listener(op, event) after every mutation: ('put', event) for a created
+        or updated event, ('delete', event) for a deleted one and ('reset', None) when
+        all events are replaced. Listeners run under the write lock, in mutation order,
+        so they must be quick and must not call back into the scheduler.
+        
+        If given, initial(events) is called with the current events under the same
+        lock that registers the listener, so no mutation falls between the two"""
+        with self._lock.read():
+            if initial is not None:
+                initial(self._events)
+            self._listeners.append(listener)
+    
+    def _notify(self, op, event=None):
+        self._log_change(op, event)
+        if op == 'reset':
+            self._fragments.clear()
         else:
-            self.events = []
+            self._fragments.invalidate(event['id'])
+        for listener in self._listeners:
+            listener(op, event)
     
-    def save_events(self):
-        """Save events to JSON file"""
-        with open(self.events_file, 'w') as file:
-            json.dump(self.events, file, indent=2, default=str)
+    def _log_change(self, op, event):
+        version = self.version
+        if op == 'reset':
+            self._changes.clear()
+            self._changes_floor = version
+            return
+        if len(self._changes) == self._changes.maxlen:
+            # The oldest change is about to be dropped
+            self._changes_floor = self._changes[0][0]
+        self._changes.append((version, event['id'], event if op == 'put' else None))
     
-    def add_event(self, title, description, start_time, end_time, recurring=None):
-        """Add a new event"""
-        # Generate next available ID
-        next_id = 1
-        if self.events:
-            next_id = max(event['id'] for event in self.events) + 1
+    def changes_since(self, since):
+        """The current version and the events created, updated or deleted after version
+        since, as (version, event id, event or None if deleted) in version order with
+        only the latest change per event. Raises ChangesUnavailable if the log no
+        longer covers since"""
+        with self._lock.read():
+            version = self.version
+            if not self._changes_floor <= since <= version:
+                raise ChangesUnavailable(f'Changes since version {since} are not available')
+            latest = {}
+            for change in reversed(self._changes):
+                if change[0] <= since:
+                    break
+                latest.setdefault(change[1], change)
+        return version, sorted(latest.values(), key=lambda change: change[0])
+    
+    def _rebuild_indexes(self):
+        """Rebuild the lookup indexes from the event list"""
+        # Maps event id -> position in self._events
+        self._positions = {event['id']: position for position, event in enumerate(self._events)}
+        if self._positions:
+            self._next_id = max(self._next_id, max(self._positions) + 1)
+        for event in self._events:
+            if 'start_timestamp' not in event:
+                # Legacy events stored without pre-parsed times
+                self._stamp_times(event)
+        # Sorted (start key, id) pairs, maintained incrementally with bisect. This is
+        # the listing order: it holds every event, including recurring ones and those
+        # without valid times, and pages by slicing after a bisect
+        self._start_order = sorted((self._start_key(event), event['id']) for event in self._events)
+        # Interval index over (start, end) for time window queries. Overlap queries
+        # cannot be answered from the start order alone, since an event starting
+        # long before a window can still overlap it; recurring events are expanded
+        # at query time instead
+        by_id = {event['id']: event for event in self._events}
+        ordered = [by_id[event_id] for _, event_id in self._start_order]
+        intervals = []
+        # Recurring events, published at the end of the mutation; added in start
+        # order, so each insort appends
+        self._recurring_draft = RecurringIndex()
+        for event in ordered:
+            if is_recurring(event):
+                self._recurring_draft.add(event)
+            elif event['start_timestamp'] is not None and event['end_timestamp'] is not None:
+                intervals.append((event['start_timestamp'], event['end_timestamp'], event['id']))
+        self._intervals = IntervalTree.build(intervals)
+        # Inverted trigram index over lowercased title and description
+        self._search_texts = {}
+        self._postings = {}
+        # Term statistics for BM25 ranking
+        self._term_frequencies = {}
+        self._document_lengths = {}
+        self._total_document_length = 0
+        for event in self._events:
+            self._index_text(event)
+        # Title word suffixes for typeahead suggestions, sorted once
+        self._titles = TitleIndex(
+            (key, event['title']) for event in self._events for key in self._title_keys(event['title'].lower()))
+        if self.snapshot_reads:
+            self._snapshot = EventSnapshot.build(list(zip(self._start_order, ordered)))
+    
+    @staticmethod
+    def _parse_timestamp(value):
+        """Parse a datetime string to a POSIX timestamp, or None if invalid"""
+        try:
+            return parse_datetime(value).timestamp()
+        except (ValueError, TypeError, OverflowError):
+            return None
+    
+    @classmethod
+    def _stamp_times(cls, event):
+        """Store UTC epoch seconds next to the original start/end strings"""
+        event['start_timestamp'] = cls._parse_timestamp(event['start_time'])
+        event['end_timestamp'] = cls._parse_timestamp(event['end_time'])
+    
+    @staticmethod
+    def _start_key(event):
+        """Sort key for an event's start time as a POSIX timestamp"""
+        start = event['start_timestamp']
+        # Events with an unparseable start time sort last
+        return float('inf') if start is None else start
+    
+    def _index_interval(self, event):
+        start, end = event['start_timestamp'], event['end_timestamp']
+        if is_recurring(event):
+            self._changing_recurring().add(event)
+        elif start is not None and end is not None:
+            self._intervals.insert(start, end, event['id'])
+    
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    @staticmethod
+    def _tokenize(text):
+        return re.findall(r'\w+', text)
+    
+    @staticmethod
+    def _title_keys(title):
+        """The lowercased title from each word onwards, so any word can start a suggestion"""
+        return [title[match.start():] for match in re.finditer(r'\w+', title)]
+    
+    def _index_text(self, event):
+        title, description = event['title'].lower(), event['description'].lower()
+        self._search_texts[event['id']] = (title, description)
+        for gram in self._trigrams(title) | self._trigrams(description):
+            self._postings.setdefault(gram, set()).add(event['id'])
+        
+        tokens = self._tokenize(title) + self._tokenize(description)
+        for token in tokens:
+            frequencies = self._term_frequencies.setdefault(token, {})
+            frequencies[event['id']] = frequencies.get(event['id'], 0) + 1
+        self._document_lengths[event['id']] = len(tokens)
+        self._total_document_length += len(tokens)
+    
+    def _index_title(self, event):
+        for key in self._title_keys(event['title'].lower()):
+            self._titles.insert(key, event['title'])
+    
+    def _unindex_text(self, event):
+        title, description = self._search_texts.pop(event['id'])
+        for gram in self._trigrams(title) | self._trigrams(description):
+            posting = self._postings[gram]
+            posting.discard(event['id'])
+            if not posting:
+                del self._postings[gram]
+        
+        for token in set(self._tokenize(title) + self._tokenize(description)):
+            frequencies = self._term_frequencies[token]
+            del frequencies[event['id']]
+            if not frequencies:
+                del self._term_frequencies[token]
+        self._total_document_length -= self._document_lengths.pop(event['id'])
+    
+    def _unindex_title(self, event):
+        for key in self._title_keys(event['title'].lower()):
+            self._titles.remove(key, event['title'])
+    
+    def _index_event(self, event):
+        """Add an event to the event list and indexes"""
+        # First, so that text that cannot be tokenized fails before any index changes
+        self._index_text(event)
+        self._index_title(event)
+        self._positions[event['id']] = len(self._events)
+        self._events.append(event)
+        key = (self._start_key(event), event['id'])
+        insort(self._start_order, key)
+        self._index_interval(event)
+        if self.snapshot_reads:
+            self._snapshot = self._snapshot.with_event(key, event)
+    
+    def _unindex_event(self, event):
+        """Remove an event from the event list and indexes"""
+        key = self._start_key(event)
+        del self._start_order[bisect_left(self._start_order, (key, event['id']))]
+        if is_recurring(event):
+            self._changing_recurring().remove(event)
+            self._occurrences.invalidate(event['id'])
+        else:
+            self._intervals.remove(key, event['id'])
+        self._unindex_text(event)
+        self._unindex_title(event)
         
-        event = {
-            'id': next_id,
+        position = self._positions.pop(event['id'])
+        last = self._events.pop()
+        if position < len(self._events):
+            # Fill the hole with the former last event
+            self._events[position] = last
+            self._positions[last['id']] = position
+        if self.snapshot_reads:
+            self._snapshot = self._snapshot.without_event((key, event['id']))
+    
+    def load_events(self):
+        """Load events from the storage backend"""
+        with self._lock.write():
+            with self._mutation():
+                events, self._next_id = self.storage.load()
+                self._events = list(events)
+                self._rebuild_indexes()
+            self._notify('reset')
+    
+    def save_events(self):
+        """Save all events to the storage backend"""
+        with self._lock.read():
+            self.storage.save(self._snapshot_document())
+    
+    def _snapshot_document(self):
+        """Build the persisted state: the id sequence and the events.
+        Safe to call without the lock, as commits and group commit's flusher do"""
+        while True:
+            sequence = self._sequence
+            if sequence % 2 == 0:
+                # Events are replaced rather than changed, so copying the list is enough
+                document = {'next_id': self._next_id, 'events': list(self._events)}
+                if self._sequence == sequence:
+                    return document
+            time.sleep(0)
+    
+    def _allocate_id(self):
+        """Take the next id from the sequence; the caller must hold the write lock"""
+        event_id = self._next_id
+        self._next_id += 1
+        return event_id
+    
+    @classmethod
+    def _new_event_fields(cls, title, description, start_time, end_time, recurring=None):
+        """Everything but the id of a new event"""
+        fields = {
             'title': title,
             'description': description,
             'start_time': start_time,
@@ -387,102 +2058,997 @@ class EventScheduler:
             'recurring': recurring,
             'created_at': datetime.now().isoformat()
         }
-        self.events.append(event)
-        self.save_events()
+        cls._check_fields(fields)
+        cls._stamp_times(fields)
+        return fields
+    
+    @staticmethod
+    def _check_fields(fields):
+        """Raise ValueError for values the indexes cannot hold, before any index changes"""
+        for field in ('title', 'description'):
+            if field in fields and not isinstance(fields[field], str):
+                raise ValueError(f'{field} must be a string')
+        if not valid_recurrence(fields.get('recurring')):
+            raise ValueError(RECURRENCE_ERROR)
+    
+    def _create_event(self, fields):
+        """Add an event with the next id; the caller must hold the write lock inside a mutation"""
+        event = {'id': self._allocate_id(), **fields}
+        self._index_event(event)
         return event
     
-    def get_all_events(self):
-        """Get all events sorted by start time"""
-        return sorted(self.events, key=lambda x: x['start_time'])
+    def _replace_event(self, event_id, changes):
+        """Swap in an updated copy of an event, or return None if there is no such event;
+        the caller must hold the write lock inside a mutation"""
+        old = self._get_event(event_id)
+        if not old:
+            return None
+        # Updates replace the event rather than changing it, so snapshots and
+        # readers still holding the old version never see a half-applied update
+        self._check_fields(changes)
+        event = {**old, **changes}
+        if 'start_time' in changes or 'end_time' in changes:
+            self._stamp_times(event)
+        self._unindex_event(old)
+        self._index_event(event)
+        return event
+    
+    def _remove_event(self, event_id):
+        """Remove an event and return it, or None if there is no such event;
+        the caller must hold the write lock inside a mutation"""
+        event = self._get_event(event_id)
+        if event:
+            self._unindex_event(event)
+        return event
+    
+    def add_event(self, title, description, start_time, end_time, recurring=None):
+        """Add a new event"""
+        fields = self._new_event_fields(title, description, start_time, end_time, recurring)
+        with self._writing() as records:
+            with self._mutation():
+                event = self._create_event(fields)
+            records.append({'op': 'put', 'event': event})
+            self._notify('put', event)
+        return event
+    
+    def get_all_events(self, after=None, limit=None):
+        """Get all events sorted by start time, optionally one page at a time"""
+        return list(self.iter_events_by_start(after=after, limit=limit))
+    
+    def iter_events_by_start(self, start=None, end=None, after=None, limit=None):
+        """Yield events in (start time, id) order, optionally limited to start keys
+        in [start, end], resuming after the (start key, id) pair after, up to limit events.
+        The index is read in fixed-size chunks, each resuming after the last key of the
+        one before, so memory stays constant however many events are yielded"""
+        if self.snapshot_reads:
+            # One snapshot serves the whole iteration, so it sees a single point in time
+            yield from self._snapshot.iter_events(start, end, after, limit)
+            return
+        upper = (math.inf if end is None else end, math.inf)
+        yielded = 0
+        while True:
+            # Only hold the read lock while copying out a chunk, never across a yield
+            with self._lock.read():
+                low = 0 if start is None else bisect_left(self._start_order, (start,))
+                if after is not None:
+                    low = max(low, bisect_right(self._start_order, tuple(after)))
+                chunk = self._start_order[low:low + self.ITER_CHUNK_SIZE]
+                events = []
+                for key, event_id in chunk:
+                    if (key, event_id) > upper:
+                        break
+                    events.append(self._events[self._positions[event_id]])
+            for event in events:
+                if yielded == limit:
+                    return
+                yielded += 1
+                yield event
+            if len(chunk) < self.ITER_CHUNK_SIZE or len(events) < len(chunk):
+                return
+            start, after = None, chunk[-1]
+    
+    def _get_event(self, event_id):
+        position = self._positions.get(event_id)
+        if position is None:
+            return None
+        return self._events[position]
+    
+    def event_json(self, event):
+        """The event, or an occurrence of a recurring event, encoded as JSON bytes.
+        Encodings are cached until the event is updated or deleted"""
+        return self._fragments.encode(event)
     
     def get_event_by_id(self, event_id):
         """Get event by ID"""
-        for event in self.events:
-            if event['id'] == event_id:
-                return event
-        return None
+        if self.snapshot_reads:
+            return self._snapshot.get(event_id)
+        with self._lock.read():
+            return self._get_event(event_id)
     
     def update_event(self, event_id, title=None, description=None, start_time=None, end_time=None, recurring=None):
         """Update an existing event"""
-        event = self.get_event_by_id(event_id)
-        if not event:
-            return None
-        
-        if title is not None:
-            event['title'] = title
-        if description is not None:
-            event['description'] = description
-        if start_time is not None:
-            event['start_time'] = start_time
-        if end_time is not None:
-            event['end_time'] = end_time
-        if recurring is not None:
-            event['recurring'] = recurring
-        
-        self.save_events()
+        changes = {field: value for field, value in [
+            ('title', title), ('description', description), ('start_time', start_time),
+            ('end_time', end_time), ('recurring', recurring)
+        ] if value is not None}
+        with self._writing() as records:
+            with self._mutation(records):
+                event = self._replace_event(event_id, changes)
+                if event:
+                    records.append({'op': 'put', 'event': event})
+            if not event:
+                return None
+            
+            self._notify('put', event)
         return event
     
     def delete_event(self, event_id):
         """Delete an event"""
-        event = self.get_event_by_id(event_id)
-        if not event:
-            return False
-        
-        self.events.remove(event)
-        self.save_events()
+        with self._writing() as records:
+            with self._mutation(records):
+                event = self._remove_event(event_id)
+                if event:
+                    records.append({'op': 'delete', 'id': event_id})
+            if not event:
+                return False
+            
+            self._notify('delete', event)
         return True
     
-    def search_events(self, query):
-        """Search events by title or description"""
-        query = query.lower()
+    def apply_operations(self, operations):
+        """Apply a batch of ('create', fields), ('update', id, changes) and ('delete', id)
+        operations in order, under one write lock and with one storage commit. Fields
+        are add_event's keyword arguments and changes hold the fields to update.
+        Returns a result per operation: the created or updated event, True for a
+        delete, or None if the event to update or delete does not exist"""
+        for operation in operations:
+            if operation[0] not in ('create', 'update', 'delete'):
+                raise ValueError(f'Unknown operation: {operation[0]}')
+        # Build new events before taking the lock
+        prepared = [('create', self._new_event_fields(**operation[1])) if operation[0] == 'create' else operation
+                    for operation in operations]
         results = []
-        for event in self.events:
-            if (query in event['title'].lower() or 
-                query in event['description'].lower()):
-                results.append(event)
+        changes = []
+        with self._writing() as records:
+            with self._mutation(records):
+                for operation in prepared:
+                    if operation[0] == 'create':
+                        event = self._create_event(operation[1])
+                    elif operation[0] == 'update':
+                        event = self._replace_event(operation[1], operation[2])
+                    else:
+                        event = self._remove_event(operation[1])
+                        if event:
+                            records.append({'op': 'delete', 'id': operation[1]})
+                            changes.append(('delete', event))
+                        results.append(True if event else None)
+                        continue
+                    if event:
+                        records.append({'op': 'put', 'event': event})
+                        changes.append(('put', event))
+                    results.append(event)
+            for op, event in changes:
+                self._notify(op, event)
+        return results
+    
+    def search_events(self, query, rank=None, limit=None, after=None):
+        """Search events by title or description in start time order, or ranked by BM25.
+        Unranked results can be paged with the (start key, id) pair after"""
+        if rank not in (None, 'bm25'):
+            raise ValueError(f'Unsupported rank: {rank}')
+        if rank and after is not None:
+            raise ValueError('Ranked results cannot be paged with a cursor')
+        query = query.lower()
+        return self._cached_query(('search', query, rank, limit, after and tuple(after)),
+                                  lambda: self._run_search(query, rank, limit, after))
+    
+    def _cached_query(self, key, run, ttl=None):
+        """Results for the normalized query key from the cache, or from run(). With a
+        ttl, results expire after ttl seconds or when the earliest one starts"""
+        now = time.time()
+        sequence = self._sequence
+        results = self._queries.get(key, sequence // 2, now) if sequence % 2 == 0 else None
+        if results is not None:
+            return results
+        results = run()
+        # Only results that no mutation overlapped are labelled with the version
+        if sequence % 2 == 0 and self._sequence == sequence:
+            expires = None
+            if ttl is not None:
+                expires = min([now + ttl] + [event['start_timestamp'] for event in results[:1]])
+            self._queries.put(key, sequence // 2, results, expires)
         return results
     
-    def get_upcoming_events(self, hours=1):
-        """Get events that are due within the specified hours"""
-        now = datetime.now()
-        upcoming = []
-        for event in self.events:
+    def cache_metrics(self):
+        """Hit, miss and eviction counters of the query, occurrence and encoding caches"""
+        return {'queries': self._queries.metrics(), 'occurrences': self._occurrences.metrics(),
+                'fragments': self._fragments.metrics()}
+    
+    def _run_search(self, query, rank, limit, after):
+        # The trigram and term indexes change in place, so unlike snapshot reads
+        # search takes the read lock; writers only hold it while changing memory
+        with self._lock.read():
+            return self._search_events(query, rank, limit, after)
+    
+    def _search_events(self, query, rank, limit, after):
+        grams = self._trigrams(query)
+        if grams:
+            # Intersect posting lists, smallest first, to get candidates
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & posting
+        else:
+            # Queries shorter than a trigram match too broadly to index
+            candidates = self._search_texts.keys()
+        
+        matches = []
+        for event_id in candidates:
+            title, description = self._search_texts[event_id]
+            if query in title or query in description:
+                matches.append((self._start_key(self._get_event(event_id)), event_id))
+        matches.sort()
+        
+        if rank == 'bm25':
+            scores = self._bm25_scores(query, [event_id for _, event_id in matches])
+            # Stable sort keeps start time order among equal scores
+            matches.sort(key=lambda match: scores[match[1]], reverse=True)
+        elif after is not None:
+            matches = matches[bisect_right(matches, tuple(after)):]
+        
+        if limit is not None:
+            matches = matches[:limit]
+        return [self._get_event(event_id) for _, event_id in matches]
+    
+    def _bm25_scores(self, query, event_ids):
+        """BM25 relevance of each event for the query's terms"""
+        scores = dict.fromkeys(event_ids, 0.0)
+        document_count = len(self._document_lengths)
+        average_length = self._total_document_length / document_count if document_count else 0
+        for term in set(self._tokenize(query)):
+            frequencies = self._term_frequencies.get(term)
+            if not frequencies:
+                continue
+            idf = math.log(1 + (document_count - len(frequencies) + 0.5) / (len(frequencies) + 0.5))
+            for event_id in event_ids:
+                frequency = frequencies.get(event_id)
+                if frequency:
+                    length_norm = 1 - self.BM25_B + self.BM25_B * self._document_lengths[event_id] / average_length
+                    scores[event_id] += idf * frequency * (self.BM25_K1 + 1) / (frequency + self.BM25_K1 * length_norm)
+        return scores
+    
+    def suggest_titles(self, prefix, limit=10):
+        """Titles with a word starting with prefix, for typeahead"""
+        with self._lock.read():
+            return self._titles.titles_with_prefix(prefix.lower(), limit)
+    
+    @staticmethod
+    def _occurrence_key(event):
+        return (event['start_timestamp'], event['id'])
+    
+    def _recurring_occurrences(self, recurring, low, high):
+        """Occurrences of the recurring events starting in [low, high], in (start, id) order"""
+        occurrences = []
+        # A series never starts before its first occurrence
+        for event in recurring.starting_by(high):
+            occurrences.extend(self._occurrences.occurrences(event, low, high))
+        occurrences.sort(key=self._occurrence_key)
+        return occurrences
+    
+    def get_upcoming_events(self, hours=1, after=None, limit=None):
+        """Get events that are due within the specified hours, optionally one page at a time"""
+        return self._cached_query(('upcoming', hours, limit, after and tuple(after)),
+                                  lambda: list(self.iter_upcoming_events(hours, after=after, limit=limit)),
+                                  ttl=QUERY_CACHE_TTL)
+    
+    def iter_upcoming_events(self, hours=1, after=None, limit=None):
+        """Yield events, and occurrences of recurring events, that are due within the
+        specified hours"""
+        now = time.time()
+        high = now + hours * 3600
+        if self.snapshot_reads:
+            recurring = self._recurring
+            # Events without a valid end time are left out, as in the interval index,
+            # and recurring events are replaced by their occurrences
+            events = (event for event in self._snapshot.iter_events(now, high, after)
+                      if event['end_timestamp'] is not None and event['id'] not in recurring)
+        else:
+            with self._lock.read():
+                recurring = self._recurring
+                event_ids = self._intervals.starting_between(now, high, after=after, limit=limit)
+                events = [self._events[self._positions[event_id]] for event_id in event_ids]
+        
+        occurrences = self._recurring_occurrences(recurring, now, high)
+        if after is not None:
+            occurrences = occurrences[bisect_right([self._occurrence_key(event) for event in occurrences], tuple(after)):]
+        yield from islice(heapq.merge(events, occurrences, key=self._occurrence_key), limit)
+    
+    def get_events_in_range(self, start, end):
+        """Get events, and occurrences of recurring events, overlapping the window
+        [start, end), ordered by start time"""
+        low, high = start.timestamp(), end.timestamp()
+        with self._lock.read():
+            event_ids = self._intervals.overlapping(low, high)
+            events = [self._events[self._positions[event_id]] for event_id in event_ids]
+            recurring = self._recurring
+        
+        # Occurrences that started before the window may still overlap it
+        occurrences = [event for event in self._recurring_occurrences(recurring, low - recurring.longest, high)
+                       if event['start_timestamp'] < high and event['end_timestamp'] > low]
+        return list(heapq.merge(events, occurrences, key=self._occurrence_key))
+
+def encode_cursor(event):
+    """Opaque pagination cursor for the (start time, id) position of an event"""
+    key = f"{EventScheduler._start_key(event)!r}:{event['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor into a (start key, id) pair"""
+    try:
+        start, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(start), int(event_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+class ReminderEngine:
+    """Fires one reminder per event, or per occurrence of a recurring event, lead
+    seconds before it starts. Each recurring event has one pending reminder, for its
+    next occurrence, which is replaced by the following one when it fires.
+    
+    Fire times are kept in a min-heap that follows the scheduler's mutations, and
+    the engine thread sleeps until the earliest one is due. Changed or deleted
+    events leave their old heap entries behind; an entry is skipped when it reaches
+    the top if it no longer matches the event's pending reminder."""
+    
+    def __init__(self, scheduler, notify, lead=REMINDER_LEAD_MINUTES * 60):
+        self.scheduler = scheduler
+        # Called with the list of events whose reminders are due
+        self.notify = notify
+        self.lead = lead
+        self._condition = threading.Condition()
+        # (fire time, event id, start timestamp)
+        self._heap = []
+        # Event id -> (start timestamp, occurrence, event) of the reminder still to fire
+        self._pending = {}
+        # Event id -> start timestamp it was reminded about, until that start has passed
+        self._fired = {}
+        # (start timestamp, event id) of the fired entries, to expire them in start order
+        self._fired_heap = []
+        self._stopped = False
+        self._thread = None
+        scheduler.add_listener(self._on_change, initial=self._initial)
+    
+    def _initial(self, events):
+        with self._condition:
+            self._reset(events)
+    
+    def _schedule(self, event):
+        """Queue the event's reminder, replacing any pending one; the caller must hold the condition"""
+        event_id = event['id']
+        self._pending.pop(event_id, None)
+        now = time.time()
+        fired = self._fired.get(event_id)
+        if is_recurring(event):
+            # The first occurrence not yet reminded about
+            occurrence = next_occurrence(event, now if fired is None else max(now, fired))
+        else:
+            start = event['start_timestamp']
+            occurrence = event if start is not None and start > now and start != fired else None
+        if occurrence is None:
+            return
+        start = occurrence['start_timestamp']
+        self._pending[event_id] = (start, occurrence, event)
+        heapq.heappush(self._heap, (start - self.lead, event_id, start))
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            # Mostly stale entries; rebuild from the pending reminders
+            self._heap = [(start - self.lead, event_id, start) for event_id, (start, _, _) in self._pending.items()]
+            heapq.heapify(self._heap)
+    
+    def _reset(self, events):
+        self._heap = []
+        self._pending = {}
+        ids = {event['id'] for event in events}
+        self._fired = {event_id: start for event_id, start in self._fired.items() if event_id in ids}
+        for event in events:
+            self._schedule(event)
+    
+    def _on_change(self, op, event):
+        with self._condition:
+            if op == 'put':
+                self._schedule(event)
+            elif op == 'delete':
+                self._pending.pop(event['id'], None)
+                self._fired.pop(event['id'], None)
+            else:
+                self._reset(self.scheduler.events)
+            # The next fire time may have moved
+            self._condition.notify_all()
+    
+    def due(self, now=None):
+        """Take the events whose reminders are due by now, in fire time order"""
+        now = time.time() if now is None else now
+        events = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, event_id, start = heapq.heappop(self._heap)
+                pending = self._pending.get(event_id)
+                if pending is None or pending[0] != start:
+                    continue
+                del self._pending[event_id]
+                self._fired[event_id] = start
+                heapq.heappush(self._fired_heap, (start, event_id))
+                events.append(pending[1])
+                if is_recurring(pending[2]):
+                    try:
+                        self._schedule(pending[2])
+                    except Exception as e:
+                        # No next occurrence to remind about
+                        print(f"Error scheduling reminder for event {event_id}: {e}")
+            # Once an occurrence has started, no reschedule can pick it again
+            while self._fired_heap and self._fired_heap[0][0] <= now:
+                start, event_id = heapq.heappop(self._fired_heap)
+                if self._fired.get(event_id) == start:
+                    del self._fired[event_id]
+        return events
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    delay = self._heap[0][0] - time.time() if self._heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    # Reminders centuries out are further than a wait can be
+                    self._condition.wait(None if delay is None else min(delay, threading.TIMEOUT_MAX))
+                if self._stopped:
+                    return
             try:
-                start_time = parser.parse(event['start_time'])
-                time_diff = start_time - now
-                if timedelta(0) <= time_diff <= timedelta(hours=hours):
-                    upcoming.append(event)
-            except (ValueError, TypeError):
-                # Skip events with invalid datetime
+                events = self.due()
+            except Exception as e:
+                # The entries taken so far are gone, so the next pass moves on
+                print(f"Error collecting reminders: {e}")
                 continue
-        return upcoming
+            if events:
+                try:
+                    self.notify(events)
+                except Exception as e:
+                    print(f"Error sending reminders: {e}")
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+def reminder_line(event):
+    """One line of reminder text for an event"""
+    start_time = datetime.fromtimestamp(event['start_timestamp'])
+    return f"REMINDER: {event['title']} starts at {start_time.strftime('%H:%M')}"
+
+class ReminderSink(ABC):
+    """Destination for reminders"""
+    
+    name = 'sink'
+    
+    @abstractmethod
+    def deliver(self, events):
+        """Send a batch of events; raise to have the whole batch retried"""
+
+class ConsoleSink(ReminderSink):
+    name = 'console'
+    
+    def deliver(self, events):
+        print("\n=== REMINDERS ===\n" + "\n".join(reminder_line(event) for event in events) + "\n================\n")
+
+class LogFileSink(ReminderSink):
+    """Appends one timestamped line per reminder"""
+    
+    name = 'log'
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def deliver(self, events):
+        sent_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock, open(self.path, 'a') as file:
+            file.write(''.join(f"{sent_at} {reminder_line(event)}\n" for event in events))
+
+class WebhookSink(ReminderSink):
+    """POSTs {"reminders": [...events]} as JSON"""
+    
+    name = 'webhook'
+    
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+    
+    def deliver(self, events):
+        webhook_request = urllib.request.Request(
+            self.url, data=json.dumps({'reminders': events}, default=str).encode(),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        # Raises HTTPError for error statuses
+        with urllib.request.urlopen(webhook_request, timeout=self.timeout):
+            pass
+
+class SMTPSink(ReminderSink):
+    """Sends one email per batch"""
+    
+    name = 'smtp'
+    
+    def __init__(self, host, port, sender, recipients, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.timeout = timeout
+    
+    def deliver(self, events):
+        message = EmailMessage()
+        message['Subject'] = f"{len(events)} upcoming event{'s' if len(events) > 1 else ''}"
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content("\n".join(reminder_line(event) for event in events))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+class StreamSink(ReminderSink):
+    """Publishes each batch as one 'reminder' message to the live change feed"""
+    
+    name = 'stream'
+    
+    def __init__(self, hub):
+        self.hub = hub
+    
+    def deliver(self, events):
+        self.hub.publish('reminder', {'events': events})
+
+class ReminderDispatcher:
+    """Delivers reminders to sinks off the reminder engine's thread.
+    
+    Every sink has its own bounded queue and pool of worker threads, so a slow or
+    failing sink only delays itself. Workers take up to batch_size queued reminders
+    at a time and retry a failed batch with exponential backoff. Reminders arriving
+    at a full queue are dropped and counted."""
+    
+    _STOP = object()
+    
+    def __init__(self, sinks, workers=REMINDER_WORKERS, queue_size=REMINDER_QUEUE_SIZE,
+                 batch_size=REMINDER_BATCH_SIZE, max_attempts=REMINDER_MAX_ATTEMPTS,
+                 backoff=REMINDER_RETRY_BACKOFF):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._metrics_lock = threading.Lock()
+        self._lanes = []
+        for sink in sinks:
+            lane = {
+                'sink': sink,
+                'queue': queue.Queue(queue_size),
+                'threads': [],
+                'metrics': {'queued': 0, 'delivered': 0, 'failed': 0, 'dropped': 0, 'retries': 0,
+                            'batches': 0, 'latency_total': 0.0, 'latency_max': 0.0},
+            }
+            for _ in range(workers):
+                thread = threading.Thread(target=self._work, args=(lane,), daemon=True)
+                thread.start()
+                lane['threads'].append(thread)
+            self._lanes.append(lane)
+    
+    def _count(self, lane, **amounts):
+        with self._metrics_lock:
+            for name, amount in amounts.items():
+                lane['metrics'][name] += amount
+    
+    def dispatch(self, events):
+        """Queue events for every sink without waiting for delivery"""
+        queued_at = time.monotonic()
+        for lane in self._lanes:
+            queued = 0
+            for event in events:
+                try:
+                    lane['queue'].put_nowait((queued_at, event))
+                    queued += 1
+                except queue.Full:
+                    break
+            self._count(lane, queued=queued, dropped=len(events) - queued)
+    
+    def _next_batch(self, lane):
+        """Block for one queued reminder, then take whatever else is waiting"""
+        batch = [lane['queue'].get()]
+        while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+            try:
+                batch.append(lane['queue'].get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _work(self, lane):
+        while True:
+            batch = self._next_batch(lane)
+            stop = batch[-1] is self._STOP
+            items = batch[:-1] if stop else batch
+            if items:
+                self._deliver(lane, items)
+            for _ in batch:
+                lane['queue'].task_done()
+            if stop:
+                return
+    
+    def _deliver(self, lane, items):
+        events = [event for _, event in items]
+        for attempt in range(self.max_attempts):
+            try:
+                lane['sink'].deliver(events)
+            except Exception as e:
+                if attempt + 1 == self.max_attempts:
+                    print(f"Giving up on {len(events)} reminders for {lane['sink'].name}: {e}")
+                    self._count(lane, failed=len(events))
+                    return
+                self._count(lane, retries=1)
+                # Full jitter keeps workers from retrying in lockstep
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                continue
+            now = time.monotonic()
+            latencies = [now - queued_at for queued_at, _ in items]
+            with self._metrics_lock:
+                metrics = lane['metrics']
+                metrics['delivered'] += len(events)
+                metrics['batches'] += 1
+                metrics['latency_total'] += sum(latencies)
+                metrics['latency_max'] = max(metrics['latency_max'], max(latencies))
+            return
+    
+    def metrics(self):
+        """Per-sink counters, queue depth and delivery latency"""
+        result = {}
+        with self._metrics_lock:
+            for lane in self._lanes:
+                metrics = lane['metrics']
+                result[lane['sink'].name] = {
+                    'queue_depth': lane['queue'].qsize(),
+                    'queued': metrics['queued'],
+                    'delivered': metrics['delivered'],
+                    'failed': metrics['failed'],
+                    'dropped': metrics['dropped'],
+                    'retries': metrics['retries'],
+                    'batches': metrics['batches'],
+                    'latency_avg_ms': metrics['latency_total'] / metrics['delivered'] * 1000 if metrics['delivered'] else 0.0,
+                    'latency_max_ms': metrics['latency_max'] * 1000,
+                }
+        return result
+    
+    def close(self):
+        """Deliver everything queued, then stop the workers"""
+        for lane in self._lanes:
+            for _ in lane['threads']:
+                lane['queue'].put(self._STOP)
+        for lane in self._lanes:
+            for thread in lane['threads']:
+                thread.join()
+
+def create_reminder_sinks():
+    """Build a sink for each configured reminder destination"""
+    sinks = []
+    if REMINDER_CONSOLE:
+        sinks.append(ConsoleSink())
+    if REMINDER_LOG_FILE:
+        sinks.append(LogFileSink(REMINDER_LOG_FILE))
+    if REMINDER_WEBHOOK_URL:
+        sinks.append(WebhookSink(REMINDER_WEBHOOK_URL))
+    if REMINDER_SMTP:
+        sinks.append(SMTPSink(**REMINDER_SMTP))
+    return sinks
+
+def format_sse(kind, data, message_id=None):
+    """One server-sent event; data is sent as single-line JSON"""
+    head = f"id: {message_id}\n" if message_id is not None else ''
+    return f"{head}event: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class StreamSubscription:
+    """One client's bounded buffer of (version, message) pairs. Reminders and
+    overflow notices have no version"""
+    
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self._messages = deque()
+        self._condition = threading.Condition()
+        # Pushes that found the buffer full
+        self.overflows = 0
+    
+    def push(self, message, version=None):
+        with self._condition:
+            if len(self._messages) >= self.buffer_size:
+                # Too far behind to catch up message by message; the client reloads
+                # and carries on from the messages that follow
+                self._messages.clear()
+                self._messages.append((None, format_sse('resync', {'reason': 'overflow'})))
+                self.overflows += 1
+            self._messages.append((version, message))
+            self._condition.notify()
+    
+    def replay(self, messages, version):
+        """Put catch-up messages up to version ahead of the buffer, dropping buffered
+        changes they already cover"""
+        with self._condition:
+            live = [(message_version, message) for message_version, message in self._messages
+                    if message_version is None or message_version > version]
+            self._messages = deque(messages + live)
+            self._condition.notify()
+    
+    def get(self, timeout):
+        """Wait up to timeout seconds for messages and take all of them"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._messages, timeout)
+            messages = [message for _, message in self._messages]
+            self._messages.clear()
+        return messages
+
+class EventStreamHub:
+    """Fans scheduler mutations and reminders out to live stream subscribers.
+    
+    Every message is formatted once and pushed to each subscriber's bounded buffer,
+    so publishing never waits on a client. A subscriber whose buffer fills up has it
+    replaced by a single 'resync' message telling the client to reload. Changes
+    carry an id of "<instance>:<version>" so that a reconnecting client can be
+    caught up from the scheduler's change log."""
+    
+    def __init__(self, scheduler, buffer_size=STREAM_CLIENT_BUFFER, max_clients=STREAM_MAX_CLIENTS):
+        self.scheduler = scheduler
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._published = 0
+        self._resyncs = 0
+        scheduler.add_listener(self._on_change)
+    
+    def subscribe(self):
+        """A new subscription, or None if max_clients are already connected"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = StreamSubscription(self.buffer_size)
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                self._resyncs += subscription.overflows
+    
+    def publish(self, kind, data, version=None):
+        message_id = f"{self.scheduler.instance_id}:{version}" if version is not None else None
+        message = format_sse(kind, data, message_id)
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._published += 1
+        for subscription in subscribers:
+            subscription.push(message, version)
+    
+    def _on_change(self, op, event):
+        version = self.scheduler.version
+        if op == 'put':
+            self.publish('put', {'version': version, 'event': event}, version)
+        elif op == 'delete':
+            self.publish('delete', {'version': version, 'id': event['id']}, version)
+        else:
+            self.publish('resync', {'version': version, 'reason': 'reset'}, version)
+    
+    def catch_up(self, subscription, last_event_id):
+        """Replay the changes a client missed after last_event_id, or tell it to
+        reload if the change log no longer covers them"""
+        instance, _, since = last_event_id.partition(':')
+        try:
+            if instance != self.scheduler.instance_id or not since.isdigit():
+                raise ChangesUnavailable('Unknown stream position')
+            version, changes = self.scheduler.changes_since(int(since))
+            if len(changes) > self.buffer_size:
+                raise ChangesUnavailable('Too many changes to replay')
+        except ChangesUnavailable:
+            version = self.scheduler.version
+            subscription.replay([(None, format_sse('resync', {'version': version, 'reason': 'unavailable'}))], -1)
+            return
+        messages = []
+        for change_version, event_id, event in changes:
+            message_id = f"{self.scheduler.instance_id}:{change_version}"
+            if event:
+                message = format_sse('put', {'version': change_version, 'event': event}, message_id)
+            else:
+                message = format_sse('delete', {'version': change_version, 'id': event_id}, message_id)
+            messages.append((change_version, message))
+        subscription.replay(messages, version)
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'published': self._published,
+                'resyncs': self._resyncs + sum(subscription.overflows for subscription in self._subscribers),
+            }
 
 # Initialize the scheduler
-scheduler = EventScheduler()
-
-def check_reminders():
-    """Check for upcoming events and display reminders"""
-    upcoming = scheduler.get_upcoming_events(1)  # Next hour
-    if upcoming:
-        print("\n=== REMINDERS ===")
-        for event in upcoming:
-            start_time = parser.parse(event['start_time'])
-            print(f"REMINDER: {event['title']} starts at {start_time.strftime('%H:%M')}")
-        print("================\n")
-
-# Start reminder thread
-def start_reminder_thread():
-    """Start the reminder checking thread"""
-    schedule.every().minute.do(check_reminders)
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+scheduler = EventScheduler(storage=create_storage(), snapshot_reads=SNAPSHOT_READS)
+# Write out anything group commit still has queued
+atexit.register(scheduler.storage.close)
+
+# Live change feed for connected clients
+stream_hub = EventStreamHub(scheduler)
+
+# Start the reminder engine and its delivery workers
+dispatcher = ReminderDispatcher(create_reminder_sinks() + [StreamSink(stream_hub)])
+reminders = ReminderEngine(scheduler, dispatcher.dispatch)
+reminders.start()
+
+# Largest page a client can request with ?limit=
+MAX_PAGE_SIZE = 1000
+
+# Streamed responses are written in chunks of roughly this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Most operations accepted by one bulk request
+BULK_MAX_OPERATIONS = 10000
 
-reminder_thread = threading.Thread(target=start_reminder_thread, daemon=True)
-reminder_thread.start()
+# Fields a client may set when creating or updating an event
+EVENT_FIELDS = ['title', 'description', 'start_time', 'end_time', 'recurring']
 
 # API Routes
 
+def creation_error(data):
+    """Why data cannot create an event, or None if it is valid"""
+    for field in ['title', 'description', 'start_time', 'end_time']:
+        if field not in data:
+            return f'Missing required field: {field}'
+    for field in ['title', 'description']:
+        if not isinstance(data[field], str):
+            return f'{field} must be a string'
+    if not valid_recurrence(data.get('recurring')):
+        return RECURRENCE_ERROR
+    
+    try:
+        # Timestamps, as a naive and an offset-aware datetime cannot be compared.
+        # Naive times at the edges of the datetime range have none
+        start = parse_datetime(data['start_time']).timestamp()
+        end = parse_datetime(data['end_time']).timestamp()
+    except (ValueError, TypeError, OverflowError):
+        return 'Invalid datetime format'
+    
+    if end <= start:
+        return 'End time must be after start time'
+    return None
+
+def update_error(data):
+    """Why data cannot update an event, or None if it is valid"""
+    for field in ['title', 'description']:
+        # None leaves the field unchanged
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f'{field} must be a string'
+    if not valid_recurrence(data.get('recurring')):
+        return RECURRENCE_ERROR
+    
+    times = {}
+    for field in ['start_time', 'end_time']:
+        if field in data:
+            try:
+                times[field] = parse_datetime(data[field]).timestamp()
+            except (ValueError, TypeError, OverflowError):
+                return f'Invalid {field} format'
+    
+    if len(times) == 2 and times['end_time'] <= times['start_time']:
+        return 'End time must be after start time'
+    return None
+
+def page_params():
+    """Read the limit and cursor query parameters, raising ValueError if invalid"""
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValueError('Limit must be a positive integer')
+        limit = min(limit, MAX_PAGE_SIZE)
+    
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    return limit, after
+
+def iter_chunks(pieces):
+    """Group small byte string pieces into chunks of about STREAM_CHUNK_BYTES"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+def iter_json_body(events, **fields):
+    """Serialize {"events": [...], "success": true, **fields} one event at a time
+    from the scheduler's cached event encodings. The status comes last, so that an
+    error once the response has started can still close the array and report
+    "success": false with the error"""
+    yield b'{"events":['
+    separator = b''
+    try:
+        for event in events:
+            yield separator
+            yield scheduler.event_json(event)
+            separator = b','
+    except Exception as e:
+        yield b'],' + dumps_json({'success': False, 'error': str(e)})[1:]
+        return
+    yield b'],' + dumps_json({'success': True, **fields})[1:]
+
+def iter_ndjson(events):
+    """Serialize events as newline-delimited JSON. An error once the response has
+    started ends it with a {"success": false, "error": ...} line"""
+    try:
+        for event in events:
+            yield scheduler.event_json(event)
+            yield b'\n'
+    except Exception as e:
+        yield dumps_json({'success': False, 'error': str(e)}) + b'\n'
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def list_etag(version, *extra):
+    """ETag for this request's list response at a store version; extra holds
+    anything else the response depends on"""
+    variant = f"{request.full_path}|{wants_ndjson()}|{extra!r}"
+    return f"{scheduler.instance_id}-{version}-{zlib.crc32(variant.encode()):08x}"
+
+def page_response(events, limit, etag=None):
+    """Build a list response; one extra event beyond limit means another page exists.
+    Responses are streamed as NDJSON when the client prefers it, and full (unpaged)
+    results are streamed as a JSON array instead of being serialized in memory.
+    Memory stays constant only when events is a lazy iterator, as for the full
+    listing; search and upcoming results are collected first.
+    With an etag, a client that already has this version gets an empty 304"""
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = list_body(events, limit)
+    if etag is not None:
+        response.set_etag(etag)
+        response.vary.add('Accept')
+    return response, response.status_code
+
+def list_body(events, limit):
+    next_cursor = None
+    if limit is not None:
+        events = list(events)
+        if len(events) > limit:
+            events = events[:limit]
+            next_cursor = encode_cursor(events[-1])
+    
+    if wants_ndjson():
+        response = Response(iter_chunks(iter_ndjson(events)), mimetype=NDJSON_MIMETYPE)
+        if limit is not None:
+            response.headers['X-Next-Cursor'] = next_cursor or ''
+        return response
+    
+    if limit is None:
+        return Response(iter_chunks(iter_json_body(events)), mimetype='application/json')
+    return Response(b''.join(iter_json_body(events, next_cursor=next_cursor)), mimetype='application/json')
+
 @app.route('/')
 def index():
     """Serve the main web interface"""
@@ -492,8 +3058,18 @@ def index():
 def get_events():
     """Get all events"""
     try:
-        events = scheduler.get_all_events()
-        return jsonify({'success': True, 'events': events}), 200
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        version = scheduler.version
+        events = scheduler.iter_events_by_start(after=after, limit=limit and limit + 1)
+        response, status = page_response(events, limit, list_etag(version))
+        # Where delta sync (/api/events/changes) can continue from
+        response.headers['X-Store-Version'] = str(version)
+        response.headers['X-Store-Instance'] = scheduler.instance_id
+        return response, status
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -503,22 +3079,10 @@ def create_event():
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['title', 'description', 'start_time', 'end_time']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
-        
-        # Validate datetime format
-        try:
-            start_time = parser.parse(data['start_time'])
-            end_time = parser.parse(data['end_time'])
-        except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid datetime format'}), 400
-        
-        # Validate that end_time is after start_time
-        if end_time <= start_time:
-            return jsonify({'success': False, 'error': 'End time must be after start time'}), 400
+        # Validate required fields, datetime format and order
+        error = creation_error(data)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         # Create event
         event = scheduler.add_event(
@@ -534,6 +3098,77 @@ def create_event():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def read_bulk_items():
+    """The items of a bulk request: a JSON array, or one JSON object per line when
+    sent as NDJSON. Raises ValueError if the body cannot be parsed"""
+    if request.mimetype == NDJSON_MIMETYPE:
+        return [json.loads(line) for line in request.stream if line.strip()]
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError('Expected a JSON array of operations')
+    return items
+
+def bulk_operation(item):
+    """Validate one bulk item, returning (operation for apply_operations, None) or (None, error)"""
+    if not isinstance(item, dict):
+        return None, 'Operation must be an object'
+    op = item.get('op', 'create')
+    if op == 'create':
+        error = creation_error(item)
+        if error:
+            return None, error
+        return ('create', {field: item.get(field) for field in EVENT_FIELDS}), None
+    if op not in ('update', 'delete'):
+        return None, f'Unknown op: {op}'
+    
+    event_id = item.get('id')
+    if not isinstance(event_id, int) or isinstance(event_id, bool):
+        return None, 'Missing or invalid id'
+    if op == 'delete':
+        return ('delete', event_id), None
+    error = update_error(item)
+    if error:
+        return None, error
+    return ('update', event_id, {field: item[field] for field in EVENT_FIELDS if item.get(field) is not None}), None
+
+@app.route('/api/events/bulk', methods=['POST'])
+def bulk_events():
+    """Create, update and delete many events with a single commit"""
+    try:
+        try:
+            items = read_bulk_items()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if len(items) > BULK_MAX_OPERATIONS:
+            return jsonify({'success': False, 'error': f'At most {BULK_MAX_OPERATIONS} operations per request'}), 400
+        
+        # Validate everything first; invalid items are reported and skipped
+        results = [None] * len(items)
+        operations = []
+        positions = []
+        for position, item in enumerate(items):
+            operation, error = bulk_operation(item)
+            if error:
+                results[position] = {'success': False, 'status': 400, 'error': error}
+            else:
+                operations.append(operation)
+                positions.append(position)
+        
+        for position, operation, result in zip(positions, operations, scheduler.apply_operations(operations)):
+            if result is None:
+                results[position] = {'success': False, 'status': 404, 'error': 'Event not found'}
+            elif operation[0] == 'create':
+                results[position] = {'success': True, 'status': 201, 'event': result}
+            elif operation[0] == 'update':
+                results[position] = {'success': True, 'status': 200, 'event': result}
+            else:
+                results[position] = {'success': True, 'status': 200, 'id': operation[1]}
+        
+        return jsonify({'success': True, 'results': results}), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/events/<int:event_id>', methods=['GET'])
 def get_event(event_id):
     """Get a specific event"""
@@ -553,23 +3188,10 @@ def update_event(event_id):
     try:
         data = request.get_json()
         
-        # Validate datetime format if provided
-        if 'start_time' in data:
-            try:
-                start_time = parser.parse(data['start_time'])
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid start_time format'}), 400
-        
-        if 'end_time' in data:
-            try:
-                end_time = parser.parse(data['end_time'])
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid end_time format'}), 400
-        
-        # Validate that end_time is after start_time if both are provided
-        if 'start_time' in data and 'end_time' in data:
-            if end_time <= start_time:
-                return jsonify({'success': False, 'error': 'End time must be after start time'}), 400
+        # Validate datetime format and order of any times provided
+        error = update_error(data)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         # Update event
         event = scheduler.update_event(
@@ -610,8 +3232,105 @@ def search_events():
         if not query:
             return jsonify({'success': False, 'error': 'Search query is required'}), 400
         
-        results = scheduler.search_events(query)
-        return jsonify({'success': True, 'events': results}), 200
+        rank = request.args.get('rank')
+        if rank not in (None, 'bm25'):
+            return jsonify({'success': False, 'error': f'Unsupported rank: {rank}'}), 400
+        
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if rank and after is not None:
+            return jsonify({'success': False, 'error': 'Ranked results cannot be paged with a cursor'}), 400
+        
+        etag = list_etag(scheduler.version)
+        if request.if_none_match.contains_weak(etag):
+            return page_response([], None, etag)
+        
+        if rank:
+            results = scheduler.search_events(query, rank=rank, limit=limit)
+            return page_response(results, None, etag)
+        
+        results = scheduler.search_events(query, after=after, limit=limit and limit + 1)
+        return page_response(results, limit, etag)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/events/changes', methods=['GET'])
+def get_changes():
+    """Events created, updated or deleted since a store version"""
+    try:
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({'success': False, 'error': 'A non-negative integer since is required'}), 400
+        
+        instance = request.args.get('instance')
+        try:
+            if instance is not None and instance != scheduler.instance_id:
+                raise ChangesUnavailable('Versions from another server instance cannot be synced')
+            version, changes = scheduler.changes_since(since)
+        except ChangesUnavailable as e:
+            return jsonify({'success': False, 'error': f'{e}; reload all events'}), 410
+        
+        return jsonify({
+            'success': True,
+            'version': version,
+            'instance': scheduler.instance_id,
+            'changes': [{'version': change_version, 'op': 'put', 'event': event} if event else
+                        {'version': change_version, 'op': 'delete', 'id': event_id}
+                        for change_version, event_id, event in changes]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def iter_stream(subscription):
+    """Write out a subscription's messages as they arrive, with a keepalive comment
+    whenever the stream has been idle for STREAM_HEARTBEAT_SECONDS"""
+    # Sent straight away so the client sees the stream open
+    yield ': connected\n\n'
+    while True:
+        messages = subscription.get(STREAM_HEARTBEAT_SECONDS)
+        yield ''.join(messages) if messages else ': keepalive\n\n'
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """Server-sent events for every change to the events, and for due reminders"""
+    try:
+        subscription = stream_hub.subscribe()
+        if subscription is None:
+            return jsonify({'success': False, 'error': 'Too many open streams'}), 503
+        
+        # Sent by EventSource when it reconnects
+        last_event_id = request.headers.get('Last-Event-ID')
+        if last_event_id:
+            stream_hub.catch_up(subscription, last_event_id)
+        
+        response = Response(iter_stream(subscription), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Stop reverse proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(lambda: stream_hub.unsubscribe(subscription))
+        return response
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/events/suggest', methods=['GET'])
+def suggest_events():
+    """Suggest event titles for a typed prefix"""
+    try:
+        prefix = request.args.get('prefix', '')
+        if not prefix:
+            return jsonify({'success': False, 'error': 'Prefix is required'}), 400
+        
+        limit = request.args.get('limit', 10, type=int)
+        if limit < 1:
+            return jsonify({'success': False, 'error': 'Limit must be a positive integer'}), 400
+        
+        suggestions = scheduler.suggest_titles(prefix, limit)
+        return jsonify({'success': True, 'suggestions': suggestions}), 200
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -621,8 +3340,45 @@ def get_upcoming_events():
     """Get upcoming events within specified hours"""
     try:
         hours = request.args.get('hours', 1, type=int)
-        upcoming = scheduler.get_upcoming_events(hours)
-        return jsonify({'success': True, 'events': upcoming}), 200
+        if hours > MAX_QUERY_DAYS * 24:
+            return jsonify({'success': False, 'error': f'hours must be at most {MAX_QUERY_DAYS * 24}'}), 400
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        version = scheduler.version
+        upcoming = scheduler.get_upcoming_events(hours, after=after, limit=limit and limit + 1)
+        # The window moves with the clock, so the tag also covers which events fall in it
+        etag = list_etag(version, [(event['id'], event['start_timestamp']) for event in upcoming])
+        return page_response(upcoming, limit, etag)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/events/range', methods=['GET'])
+def get_events_in_range():
+    """Get events overlapping a time window"""
+    try:
+        if not request.args.get('start') or not request.args.get('end'):
+            return jsonify({'success': False, 'error': 'Both start and end are required'}), 400
+        
+        try:
+            start_time = parse_datetime(request.args['start'])
+            end_time = parse_datetime(request.args['end'])
+            # Timestamps, as a naive and an offset-aware datetime cannot be compared.
+            # Naive times at the edges of the datetime range have none
+            start, end = start_time.timestamp(), end_time.timestamp()
+        except (ValueError, OverflowError):
+            return jsonify({'success': False, 'error': 'Invalid datetime format'}), 400
+        
+        if end <= start:
+            return jsonify({'success': False, 'error': 'End time must be after start time'}), 400
+        if end - start > MAX_QUERY_DAYS * 86400:
+            return jsonify({'success': False, 'error': f'The window can span at most {MAX_QUERY_DAYS} days'}), 400
+        
+        events = scheduler.get_events_in_range(start_time, end_time)
+        return jsonify({'success': True, 'events': events}), 200
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -632,7 +3388,20 @@ def health_check():
     """Health check endpoint"""
     return jsonify({'success': True, 'status': 'healthy'}), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Operational metrics"""
+    try:
+        return jsonify({
+            'success': True,
+            'reminders': dispatcher.metrics(),
+            'stream': stream_hub.metrics(),
+            'caches': scheduler.cache_metrics()
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 if __name__ == '__main__':
     print("Event Scheduler System starting...")
-    print("Reminder system is active - checking every minute")
+    print("Reminder system is active")
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
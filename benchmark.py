@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Event Scheduler System
+Run with: python benchmark.py
+"""
+
+import os
+import random
+import tempfile
+import time
+import timeit
+from itertools import accumulate
+from dateutil import parser
+
+import app as app_module
+from app import EventScheduler, GroupCommitStorage, JSONFileStorage, QueryCache, parse_datetime
+
+def print_separator(title):
+    """Print a formatted separator with title"""
+    print(f"\n{'='*50}")
+    print(f" {title}")
+    print(f"{'='*50}")
+
+def report(label, seconds, count):
+    """Print the per-operation cost of a timed run"""
+    print(f"{label:<32} {seconds / count * 1e6:10.2f} us/op")
+
+def bench_datetime_parsing(count=50000):
+    """Compare the ISO fast path against dateutil for request timestamps"""
+    print_separator("DATETIME PARSING")
+    
+    # Formats sent by the web UI (datetime-local) and demo.py (isoformat)
+    samples = ["2024-01-15T10:00", "2024-01-15T10:00:00", "2024-01-15T10:00:00.123456", "2024-01-15T10:00:00Z"]
+    for sample in samples:
+        print(f"\n{sample}")
+        fast = timeit.timeit(lambda: parse_datetime(sample), number=count)
+        fuzzy = timeit.timeit(lambda: parser.parse(sample), number=count)
+        report("parse_datetime", fast, count)
+        report("dateutil.parser.parse", fuzzy, count)
+        print(f"{'speedup':<32} {fuzzy / fast:10.1f}x")
+
+WORDS = ["team", "standup", "client", "review", "planning", "sprint", "budget", "design",
+         "release", "retro", "hiring", "interview", "training", "workshop", "demo", "sync"]
+
+def make_vocabulary(rng, size=5000):
+    """Common meeting words plus pseudo-words for a realistic spread of trigrams"""
+    syllables = ["ba", "ko", "ri", "tem", "lo", "sa", "vin", "du", "mar", "pe", "qua", "zet"]
+    return WORDS + ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+def make_events(count, seed=0):
+    """Build count synthetic events"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    # Meeting words are far more frequent than the long tail
+    weights = list(accumulate([200] * len(WORDS) + [1] * (len(vocabulary) - len(WORDS))))
+    events = []
+    for event_id in range(1, count + 1):
+        start = 1700000000 + rng.randint(0, 365 * 86400)
+        events.append({
+            'id': event_id,
+            'title': " ".join(rng.choices(vocabulary, cum_weights=weights, k=3)).title(),
+            'description': " ".join(rng.choices(vocabulary, cum_weights=weights, k=10)),
+            'start_time': f"{start}",
+            'end_time': f"{start + 3600}",
+            'recurring': None,
+            'created_at': "2024-01-01T00:00:00",
+            'start_timestamp': float(start),
+            'end_timestamp': float(start + 3600)
+        })
+    return events
+
+def temporary_events_file():
+    """Path for an events file that does not exist yet"""
+    fd, events_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    os.remove(events_file)
+    return events_file
+
+def make_scheduler(count, seed=0, cache_queries=False):
+    """Build a scheduler holding count synthetic events in a temporary file. Query
+    results are not cached unless cache_queries, so repeated queries are measured"""
+    bench_scheduler = EventScheduler(events_file=temporary_events_file())
+    bench_scheduler.events = make_events(count, seed)
+    if not cache_queries:
+        bench_scheduler._queries = QueryCache(capacity=0)
+    return bench_scheduler
+
+def linear_search(events, query):
+    """The original search: lowercase and scan every event"""
+    query = query.lower()
+    return [event for event in events
+            if query in event['title'].lower() or query in event['description'].lower()]
+
+def bench_search(count=100000, repeat=20):
+    """Compare the trigram index against a linear scan"""
+    print_separator(f"SEARCH ({count} events)")
+    
+    bench_scheduler = make_scheduler(count)
+    for query in ["standup", "client review", "kotemsa", "nomatch"]:
+        indexed = timeit.timeit(lambda: bench_scheduler.search_events(query), number=repeat)
+        linear = timeit.timeit(lambda: linear_search(bench_scheduler.events, query), number=repeat)
+        matches = len(bench_scheduler.search_events(query))
+        print(f"\n'{query}' ({matches} matches)")
+        report("trigram index", indexed, repeat)
+        report("linear scan", linear, repeat)
+        print(f"{'speedup':<32} {linear / indexed:10.1f}x")
+
+def bench_suggest(count=100000, repeat=1000):
+    """Measure typeahead and ranked search latency"""
+    print_separator(f"SUGGEST AND RANKED SEARCH ({count} events)")
+    
+    bench_scheduler = make_scheduler(count)
+    for prefix in ["s", "sta", "client re", "kote"]:
+        seconds = timeit.timeit(lambda: bench_scheduler.suggest_titles(prefix), number=repeat)
+        report(f"suggest '{prefix}'", seconds, repeat)
+    for query in ["client review", "kotemsa"]:
+        seconds = timeit.timeit(lambda: bench_scheduler.search_events(query, rank='bm25', limit=20), number=20)
+        report(f"bm25 '{query}'", seconds, 20)
+
+def bench_group_commit(count=10000, writes=500):
+    """Compare a snapshot rewrite per write against group commit for a burst of writes"""
+    print_separator(f"WRITE BURST ({writes} writes, {count} events)")
+    
+    bench_scheduler = make_scheduler(count)
+    for label, storage in [
+        ("rewrite per write", JSONFileStorage(bench_scheduler.events_file)),
+        ("group commit", GroupCommitStorage(JSONFileStorage(bench_scheduler.events_file))),
+    ]:
+        bench_scheduler.storage = storage
+        started = time.perf_counter()
+        for i in range(writes):
+            bench_scheduler.add_event(f"Burst {i}", "Imported", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        acknowledged = time.perf_counter() - started
+        storage.close()
+        report(f"{label} (acknowledged)", acknowledged, writes)
+        report(f"{label} (on disk)", time.perf_counter() - started, writes)
+    os.remove(bench_scheduler.events_file)
+
+def bench_recovery(count=1000000):
+    """Measure loading a checksummed snapshot, and recovering from its backup"""
+    print_separator(f"RECOVERY ({count} events)")
+    
+    storage = JSONFileStorage(temporary_events_file())
+    document = {'next_id': count + 1, 'events': make_events(count)}
+    started = time.perf_counter()
+    storage.save(document)
+    storage.save(document)
+    print(f"{'write snapshot':<32} {(time.perf_counter() - started) / 2:10.2f} s")
+    print(f"{'snapshot size':<32} {os.path.getsize(storage.events_file) / 2**20:10.1f} MiB")
+    
+    started = time.perf_counter()
+    storage.load()
+    print(f"{'load and verify':<32} {time.perf_counter() - started:10.2f} s")
+    
+    with open(storage.events_file, 'r+') as file:
+        # A torn write
+        file.truncate(os.path.getsize(storage.events_file) // 2)
+    started = time.perf_counter()
+    events, _ = storage.load()
+    print(f"{'recover from backup':<32} {time.perf_counter() - started:10.2f} s")
+    assert len(events) == count
+    
+    for path in (storage.events_file, storage.events_file + '.bak'):
+        os.remove(path)
+
+def bench_bulk(count=2000):
+    """Compare creating events with one POST each against a single bulk request"""
+    print_separator(f"BULK CREATE ({count} events)")
+    
+    items = [{'title': f"Imported {i}", 'description': "Quarterly schedule",
+              'start_time': f"2024-{1 + i % 3:02d}-{1 + i % 28:02d}T{8 + i % 10:02d}:00:00",
+              'end_time': f"2024-{1 + i % 3:02d}-{1 + i % 28:02d}T{8 + i % 10:02d}:30:00"} for i in range(count)]
+    client = app_module.app.test_client()
+    original = app_module.scheduler
+    try:
+        for label, send in [
+            ("POST /api/events each", lambda: [client.post('/api/events', json=item) for item in items]),
+            ("POST /api/events/bulk", lambda: client.post('/api/events/bulk', json=items)),
+        ]:
+            app_module.scheduler = EventScheduler(events_file=temporary_events_file())
+            seconds = timeit.timeit(send, number=1)
+            assert len(app_module.scheduler.events) == count
+            report(label, seconds, count)
+            for path in (app_module.scheduler.events_file, app_module.scheduler.events_file + '.bak'):
+                if os.path.exists(path):
+                    os.remove(path)
+    finally:
+        app_module.scheduler = original
+
+def bench_list_response(count=100000, repeat=5):
+    """Compare encoding every event for a full listing against reusing cached encodings"""
+    print_separator(f"LIST RESPONSE ({count} events)")
+    
+    client = app_module.app.test_client()
+    original = app_module.scheduler
+    app_module.scheduler = make_scheduler(count)
+    try:
+        app_module.scheduler._fragments.clear()
+        report("cold (encode every event)", timeit.timeit(lambda: client.get('/api/events').data, number=1), count)
+        warm = timeit.timeit(lambda: client.get('/api/events').data, number=repeat)
+        report("warm (cached fragments)", warm / repeat, count)
+        print(f"{'encoder':<32} {'orjson' if app_module.orjson else 'json':>10}")
+        if os.path.exists(app_module.scheduler.events_file):
+            os.remove(app_module.scheduler.events_file)
+    finally:
+        app_module.scheduler = original
+
+def bench_query_cache(count=100000, repeat=1000):
+    """Measure repeated dashboard queries with and without the query result cache"""
+    print_separator(f"QUERY CACHE ({count} events)")
+    
+    for label, cache_queries in [("uncached", False), ("cached", True)]:
+        bench_scheduler = make_scheduler(count, cache_queries=cache_queries)
+        # Synthetic events start in 2023-2024, so put some within the next day
+        now = time.time()
+        stamp = lambda timestamp: time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(timestamp))
+        bench_scheduler.apply_operations([('create', {
+            'title': f"Soon {i}", 'description': "Dashboard", 'recurring': None,
+            'start_time': stamp(now + 600 + i * 300), 'end_time': stamp(now + 4200 + i * 300)
+        }) for i in range(200)])
+        seconds = timeit.timeit(lambda: bench_scheduler.search_events("client review", limit=50), number=repeat)
+        report(f"search ({label})", seconds, repeat)
+        seconds = timeit.timeit(lambda: bench_scheduler.get_upcoming_events(24), number=repeat)
+        report(f"upcoming 24h ({label})", seconds, repeat)
+        print(f"{'':<32} {bench_scheduler.cache_metrics()['queries']}")
+        os.remove(bench_scheduler.events_file)
+
+def main():
+    """Run all benchmarks"""
+    bench_datetime_parsing()
+    bench_search()
+    bench_suggest()
+    bench_group_commit()
+    bench_recovery()
+    bench_bulk()
+    bench_list_response()
+    bench_query_cache()
+
+if __name__ == "__main__":
+    main()
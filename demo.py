@@ -174,12 +174,12 @@ def demo_reminder_system():
     """Demo the reminder system"""
     print_separator("REMINDER SYSTEM")
     
-    print("The reminder system runs in the background and checks for upcoming events every minute.")
-    print("It will display reminders for events due within the next hour.")
+    print("The reminder system runs in the background and wakes up when a reminder is due.")
+    print("It will display a reminder for each event an hour before it starts.")
     print("\nTo see reminders in action:")
     print("1. Create an event scheduled for the next 30-60 minutes")
     print("2. Wait for the reminder to appear in the console")
-    print("3. The reminder will show automatically every minute")
+    print("3. The reminder is shown once per event")
 
 def main():
     """Main demo function"""
@@ -226,7 +226,7 @@ def main():
         print_separator("DEMO COMPLETED")
         print("✅ All demos completed successfully!")
         print("\nThe Event Scheduler System is now running with:")
-        print("- Automatic reminders every minute")
+        print("- Automatic reminders an hour before each event")
         print("- Data persistence in events.json")
         print("- Full REST API functionality")
         
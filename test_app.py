@@ -1,9 +1,13 @@
 import pytest
 import json
+import random
 import os
 import tempfile
+import threading
+import time
 from datetime import datetime, timedelta
-from app import app, EventScheduler, scheduler
+import app as app_module
+from app import app, ChangesUnavailable, CorruptSnapshotError, LogFileSink, ReminderDispatcher, ReminderSink, StreamSink, WebhookSink, EventScheduler, EventStreamHub, GroupCommitStorage, IntervalTree, EventStorage, JSONFileStorage, QueryCache, ReminderEngine, SQLiteStorage, create_storage, parse_datetime, scheduler
 
 @pytest.fixture
 def client():
@@ -27,8 +31,18 @@ def test_scheduler():
     yield test_scheduler
     
     # Clean up after tests
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    for path in (test_file, test_file + '.bak'):
+        if os.path.exists(path):
+            os.remove(path)
+
+def parse_sse(text):
+    """Split server-sent event text into (event, data, id) for each message"""
+    messages = []
+    for block in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if fields:
+            messages.append((fields['event'], json.loads(fields['data']), fields.get('id')))
+    return messages
 
 def clear_events():
     """Helper function to clear events from the main scheduler"""
@@ -54,6 +68,37 @@ class TestEventScheduler:
         assert event['id'] == 1
         assert len(test_scheduler.events) == 1
     
+    def test_event_timestamps(self, test_scheduler):
+        """Test that start and end times are stored as UTC epoch seconds"""
+        event = test_scheduler.add_event(
+            title="Stamped",
+            description="Pre-parsed times",
+            start_time="2024-01-15T10:00:00Z",
+            end_time="2024-01-15T11:00:00+01:00"
+        )
+        assert event['start_timestamp'] == 1705312800
+        assert event['end_timestamp'] == 1705312800
+        
+        event = test_scheduler.update_event(event['id'], start_time="2024-01-15T09:00:00Z")
+        assert event['start_timestamp'] == 1705309200
+    
+    def test_load_legacy_events(self, test_scheduler):
+        """Test that events saved without timestamps are stamped on load"""
+        with open(test_scheduler.events_file, 'w') as file:
+            json.dump([{
+                'id': 7,
+                'title': "Legacy",
+                'description': "Saved by an older version",
+                'start_time': "2024-01-15T10:00:00Z",
+                'end_time': "2024-01-15T11:00:00Z",
+                'recurring': None,
+                'created_at': "2024-01-01T00:00:00"
+            }], file)
+        
+        test_scheduler.load_events()
+        assert test_scheduler.get_event_by_id(7)['start_timestamp'] == 1705312800
+        assert test_scheduler.add_event("New", "After legacy", "2024-01-16T10:00:00Z", "2024-01-16T11:00:00Z")['id'] == 8
+    
     def test_get_all_events(self, test_scheduler):
         """Test getting all events sorted by start time"""
         # Add events in reverse order
@@ -75,6 +120,204 @@ class TestEventScheduler:
         assert events[0]['title'] == "Earlier Event"
         assert events[1]['title'] == "Later Event"
     
+    def test_start_order_index(self, test_scheduler):
+        """Test that start order follows parsed times and is kept up to date"""
+        test_scheduler.add_event("UTC", "Zulu time", "2024-01-15T11:00:00Z", "2024-01-15T12:00:00Z")
+        test_scheduler.add_event("Offset", "Starts 10:00 UTC", "2024-01-15T12:00:00+02:00", "2024-01-15T13:00:00+02:00")
+        test_scheduler.add_event("Late", "Starts 15:00 UTC", "2024-01-15T15:00:00Z", "2024-01-15T16:00:00Z")
+        
+        titles = [event['title'] for event in test_scheduler.get_all_events()]
+        assert titles == ["Offset", "UTC", "Late"]
+        
+        test_scheduler.update_event(3, start_time="2024-01-15T09:00:00Z")
+        test_scheduler.delete_event(2)
+        titles = [event['title'] for event in test_scheduler.get_all_events()]
+        assert titles == ["Late", "UTC"]
+    
+    def test_get_all_events_paged(self, test_scheduler):
+        """Test keyset paging over start time order"""
+        for hour in (12, 10, 11, 10, 9):
+            test_scheduler.add_event(f"At {hour}", "Paged", f"2024-01-15T{hour}:00:00", f"2024-01-15T{hour}:30:00")
+        
+        first = test_scheduler.get_all_events(limit=3)
+        assert [event['id'] for event in first] == [5, 2, 4]
+        last = first[-1]
+        rest = test_scheduler.get_all_events(after=(last['start_timestamp'], last['id']), limit=3)
+        assert [event['id'] for event in rest] == [3, 1]
+    
+    def test_iter_events_by_start_chunks(self, test_scheduler, monkeypatch):
+        """Test chunked iteration while events change between chunks"""
+        monkeypatch.setattr(EventScheduler, 'ITER_CHUNK_SIZE', 2)
+        for hour in range(10, 16):
+            test_scheduler.add_event(f"At {hour}", "Chunked", f"2024-01-15T{hour}:00:00", f"2024-01-15T{hour}:30:00")
+        
+        seen = []
+        for event in test_scheduler.iter_events_by_start():
+            seen.append(event['id'])
+            if event['id'] == 2:
+                test_scheduler.delete_event(3)
+                test_scheduler.update_event(4, start_time="2024-01-15T09:00:00")
+        assert seen == [1, 2, 5, 6]
+    
+    def test_apply_operations(self, tmp_path):
+        """Test that a batch of operations is applied in order with one commit"""
+        events_file = str(tmp_path / 'events.json')
+        batch_scheduler = EventScheduler(events_file=events_file, journal=True)
+        existing = batch_scheduler.add_event("Existing", "Before", "2024-01-15T08:00:00", "2024-01-15T09:00:00")
+        
+        results = batch_scheduler.apply_operations([
+            ('create', {'title': "First", 'description': "Bulk", 'start_time': "2024-01-15T10:00:00",
+                        'end_time': "2024-01-15T11:00:00"}),
+            ('create', {'title': "Second", 'description': "Bulk", 'start_time': "2024-01-15T12:00:00",
+                        'end_time': "2024-01-15T13:00:00", 'recurring': "daily"}),
+            ('update', existing['id'], {'title': "Renamed", 'start_time': "2024-01-15T07:00:00"}),
+            ('delete', 2),
+            ('update', 99, {'title': "Missing"}),
+            ('delete', 99),
+        ])
+        assert [result and result['title'] for result in results[:3]] == ["First", "Second", "Renamed"]
+        assert results[2]['start_timestamp'] == parse_datetime("2024-01-15T07:00:00").timestamp()
+        assert results[3:] == [True, None, None]
+        assert [event['title'] for event in batch_scheduler.get_all_events()] == ["Renamed", "Second"]
+        assert batch_scheduler.search_events("first") == []
+        
+        with open(batch_scheduler.storage.journal_file) as file:
+            assert len(file.readlines()) == 1 + 4
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert [event['title'] for event in reloaded.get_all_events()] == ["Renamed", "Second"]
+        
+        with pytest.raises(ValueError):
+            batch_scheduler.apply_operations([('rename', 1)])
+    
+    def test_rejects_unindexable_text(self, test_scheduler):
+        """Test that a non-string title fails before any index changes"""
+        event = test_scheduler.add_event("Kept", "Intact", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with pytest.raises(ValueError):
+            test_scheduler.add_event(123, "Typed", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with pytest.raises(ValueError):
+            test_scheduler.update_event(event['id'], description=["Listed"])
+        assert test_scheduler.get_all_events() == [event]
+        assert test_scheduler.get_event_by_id(event['id']) is event
+        assert test_scheduler.search_events("intact") == [event]
+    
+    def test_rejects_unknown_recurrence(self, test_scheduler):
+        """Test that a recurring value other than a frequency or None fails before any index changes"""
+        event = test_scheduler.add_event("Kept", "Intact", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with pytest.raises(ValueError):
+            test_scheduler.add_event("Listed", "Typed", "2024-01-15T10:00:00", "2024-01-15T11:00:00",
+                                     recurring=["daily"])
+        with pytest.raises(ValueError):
+            test_scheduler.update_event(event['id'], recurring="yearly")
+        assert test_scheduler.get_all_events() == [event]
+        assert test_scheduler.get_events_in_range(datetime(2024, 1, 16), datetime(2024, 1, 17)) == []
+    
+    def test_version(self, test_scheduler):
+        """Test that every mutation that changes something bumps the store version"""
+        version = test_scheduler.version
+        event = test_scheduler.add_event("Versioned", "Test", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        test_scheduler.update_event(event['id'], title="Renamed")
+        test_scheduler.search_events("renamed")
+        assert test_scheduler.version == version + 2
+        test_scheduler.apply_operations([('delete', event['id']), ('delete', 12345)])
+        assert test_scheduler.version == version + 3
+        # Updates and deletes of missing events change nothing
+        assert test_scheduler.update_event(12345, title="Missing") is None
+        assert test_scheduler.delete_event(12345) is False
+        assert test_scheduler.apply_operations([('update', 12345, {'title': "Missing"}), ('delete', 12345)]) == [None, None]
+        assert test_scheduler.version == version + 3
+    
+    def test_changes_since(self, test_scheduler):
+        """Test that the change log returns the latest change per event since a version"""
+        start = test_scheduler.version
+        first = test_scheduler.add_event("First", "Log", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        second = test_scheduler.add_event("Second", "Log", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        middle = test_scheduler.version
+        first = test_scheduler.update_event(first['id'], title="First Updated")
+        test_scheduler.delete_event(second['id'])
+        
+        version, changes = test_scheduler.changes_since(start)
+        assert version == start + 4
+        assert changes == [(start + 3, first['id'], first), (start + 4, second['id'], None)]
+        assert test_scheduler.changes_since(middle)[1] == changes
+        assert test_scheduler.changes_since(version) == (version, [])
+        with pytest.raises(ChangesUnavailable):
+            test_scheduler.changes_since(version + 1)
+        
+        test_scheduler.events = []
+        with pytest.raises(ChangesUnavailable):
+            test_scheduler.changes_since(version)
+    
+    def test_change_log_is_bounded(self, tmp_path, monkeypatch):
+        """Test that versions older than the retained log are refused"""
+        monkeypatch.setattr(app_module, 'CHANGE_LOG_SIZE', 3)
+        bounded = EventScheduler(events_file=str(tmp_path / 'events.json'))
+        start = bounded.version
+        for i in range(5):
+            bounded.add_event(f"Event {i}", "Log", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with pytest.raises(ChangesUnavailable):
+            bounded.changes_since(start + 1)
+        version, changes = bounded.changes_since(start + 2)
+        assert [event['title'] for _, _, event in changes] == ["Event 2", "Event 3", "Event 4"]
+    
+    def test_event_json_cache(self, test_scheduler):
+        """Test that event encodings are cached until the event changes"""
+        event = test_scheduler.add_event("Cached", "Encoded once", "2024-01-15T10:00:00", "2024-01-15T11:00:00",
+                                         recurring="daily")
+        fragment = test_scheduler.event_json(event)
+        assert json.loads(fragment) == event
+        assert test_scheduler.event_json(event) is fragment
+        
+        occurrence = test_scheduler.get_events_in_range(datetime(2024, 1, 16), datetime(2024, 1, 17))[0]
+        occurrence_fragment = test_scheduler.event_json(occurrence)
+        assert json.loads(occurrence_fragment)['start_time'] == "2024-01-16T10:00:00"
+        assert test_scheduler.event_json(occurrence) is occurrence_fragment
+        assert test_scheduler.event_json(event) is fragment
+        
+        updated = test_scheduler.update_event(event['id'], title="Renamed")
+        assert json.loads(test_scheduler.event_json(updated))['title'] == "Renamed"
+        # Readers still holding the old event get its own encoding, which is never
+        # served for the updated event
+        assert json.loads(test_scheduler.event_json(event))['title'] == "Cached"
+        assert json.loads(test_scheduler.event_json(updated))['title'] == "Renamed"
+        test_scheduler.delete_event(event['id'])
+        assert len(test_scheduler._fragments) == 0
+    
+    def test_query_cache(self, test_scheduler, monkeypatch):
+        """Test that repeated searches and upcoming queries are served from the cache
+        until the store changes"""
+        test_scheduler.add_event("Team Standup", "Daily", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        first = test_scheduler.search_events("standup")
+        assert test_scheduler.search_events("STANDUP") == first
+        assert test_scheduler.cache_metrics()['queries']['hits'] == 1
+        
+        test_scheduler.add_event("Standup Notes", "Daily", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        assert len(test_scheduler.search_events("standup")) == 2
+        assert test_scheduler.cache_metrics()['queries']['misses'] == 2
+        
+        start = datetime.now() + timedelta(minutes=30)
+        test_scheduler.add_event("Soon", "Upcoming", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        assert [event['title'] for event in test_scheduler.get_upcoming_events(1)] == ["Soon"]
+        test_scheduler.get_upcoming_events(1)
+        assert test_scheduler.cache_metrics()['queries']['hits'] == 2
+        # Upcoming results expire with the clock
+        monkeypatch.setattr(app_module, 'QUERY_CACHE_TTL', 0)
+        test_scheduler.get_upcoming_events(2)
+        test_scheduler.get_upcoming_events(2)
+        assert test_scheduler.cache_metrics()['queries']['hits'] == 2
+    
+    def test_query_cache_eviction_and_expiry(self):
+        """Test LRU eviction, version tagging and expiry of cached results"""
+        cache = QueryCache(capacity=2)
+        cache.put('a', 1, [1])
+        cache.put('b', 1, [2])
+        assert cache.get('a', 1) == [1]
+        cache.put('c', 1, [3], expires=100.0)
+        assert cache.get('b', 1) is None
+        assert cache.get('a', 2) is None
+        assert cache.get('c', 1, now=99.0) == [3]
+        assert cache.get('c', 1, now=100.0) is None
+        assert cache.metrics() == {'size': 2, 'hits': 2, 'misses': 3, 'evictions': 1}
+    
     def test_get_event_by_id(self, test_scheduler):
         """Test getting event by ID"""
         event = test_scheduler.add_event(
@@ -133,6 +376,45 @@ class TestEventScheduler:
         success = test_scheduler.delete_event(999)
         assert success is False
     
+    def test_id_index_after_delete(self, test_scheduler):
+        """Test that lookups by ID stay consistent after deleting from the middle"""
+        for i in range(4):
+            test_scheduler.add_event(
+                title=f"Event {i + 1}",
+                description="Indexed event",
+                start_time="2024-01-15T10:00:00",
+                end_time="2024-01-15T11:00:00"
+            )
+        
+        assert test_scheduler.delete_event(2) is True
+        assert test_scheduler.get_event_by_id(2) is None
+        for event_id in (1, 3, 4):
+            assert test_scheduler.get_event_by_id(event_id)['title'] == f"Event {event_id}"
+        
+        assert test_scheduler.delete_event(4) is True
+        assert test_scheduler.update_event(3, title="Still Here")['id'] == 3
+        assert sorted(event['id'] for event in test_scheduler.events) == [1, 3]
+    
+    def test_ids_not_reused(self, test_scheduler):
+        """Test that deleting the newest event does not free its ID"""
+        for i in range(2):
+            test_scheduler.add_event(
+                title=f"Event {i + 1}",
+                description="Sequenced event",
+                start_time="2024-01-15T10:00:00",
+                end_time="2024-01-15T11:00:00"
+            )
+        test_scheduler.delete_event(2)
+        
+        event = test_scheduler.add_event("Event 3", "Sequenced event", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        assert event['id'] == 3
+        
+        # The sequence survives a restart
+        test_scheduler.delete_event(3)
+        reloaded = EventScheduler(events_file=test_scheduler.events_file)
+        event = reloaded.add_event("Event 4", "Sequenced event", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        assert event['id'] == 4
+    
     def test_search_events(self, test_scheduler):
         """Test searching events"""
         test_scheduler.add_event(
@@ -162,6 +444,52 @@ class TestEventScheduler:
         results = test_scheduler.search_events("NonExistent")
         assert len(results) == 0
     
+    def test_search_index_maintenance(self, test_scheduler):
+        """Test that search results follow updates, deletes and short queries"""
+        test_scheduler.add_event("Sprint Planning", "Plan the sprint", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        test_scheduler.add_event("Retro", "Sprint retrospective", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        test_scheduler.add_event("Lunch", "Team lunch", "2024-01-15T13:00:00", "2024-01-15T14:00:00")
+        
+        assert [event['id'] for event in test_scheduler.search_events("SPRINT")] == [1, 2]
+        assert [event['id'] for event in test_scheduler.search_events("sprint retro")] == [2]
+        assert [event['id'] for event in test_scheduler.search_events("lu")] == [3]
+        
+        test_scheduler.update_event(1, title="Backlog Grooming", description="Groom the backlog")
+        test_scheduler.delete_event(2)
+        assert test_scheduler.search_events("sprint") == []
+        assert [event['id'] for event in test_scheduler.search_events("groom")] == [1]
+    
+    def test_search_bm25_ranking(self, test_scheduler):
+        """Test ranking search results by BM25 relevance"""
+        test_scheduler.add_event("Weekly sync", "Budget review and planning", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        test_scheduler.add_event("Budget review", "Review the budget, budget owners only", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        test_scheduler.add_event("Lunch", "Team lunch", "2024-01-15T13:00:00", "2024-01-15T14:00:00")
+        
+        results = test_scheduler.search_events("budget", rank='bm25')
+        assert [event['id'] for event in results] == [2, 1]
+        results = test_scheduler.search_events("budget", rank='bm25', limit=1)
+        assert [event['id'] for event in results] == [2]
+        
+        with pytest.raises(ValueError):
+            test_scheduler.search_events("budget", rank='tfidf')
+    
+    def test_suggest_titles(self, test_scheduler):
+        """Test typeahead suggestions from title prefixes"""
+        test_scheduler.add_event("Sprint Planning", "Plan", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        test_scheduler.add_event("Planning Poker", "Estimate", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        test_scheduler.add_event("Sprint Planning", "Second team", "2024-01-16T10:00:00", "2024-01-16T11:00:00")
+        
+        # Ordered by the matched key: "planning" sorts before "planning poker"
+        assert test_scheduler.suggest_titles("plan") == ["Sprint Planning", "Planning Poker"]
+        assert test_scheduler.suggest_titles("SPRINT PL") == ["Sprint Planning"]
+        assert test_scheduler.suggest_titles("plan", limit=1) == ["Sprint Planning"]
+        
+        test_scheduler.delete_event(1)
+        assert test_scheduler.suggest_titles("sprint") == ["Sprint Planning"]
+        test_scheduler.update_event(3, title="Retro")
+        assert test_scheduler.suggest_titles("sprint") == []
+        assert test_scheduler.suggest_titles("re") == ["Retro"]
+    
     def test_get_upcoming_events(self, test_scheduler):
         """Test getting upcoming events"""
         # Add an event in the future
@@ -185,6 +513,870 @@ class TestEventScheduler:
         upcoming = test_scheduler.get_upcoming_events(hours=3)
         assert len(upcoming) == 1
         assert upcoming[0]['title'] == "Future Event"
+    
+    def test_get_events_in_range(self, test_scheduler):
+        """Test getting events overlapping a time window"""
+        test_scheduler.add_event("Morning", "Morning event", "2024-01-15T09:00:00", "2024-01-15T10:00:00")
+        test_scheduler.add_event("Long", "All day event", "2024-01-15T08:00:00", "2024-01-15T18:00:00")
+        test_scheduler.add_event("Afternoon", "Afternoon event", "2024-01-15T14:00:00", "2024-01-15T15:00:00")
+        
+        events = test_scheduler.get_events_in_range(
+            datetime(2024, 1, 15, 10, 0), datetime(2024, 1, 15, 12, 0)
+        )
+        assert [event['title'] for event in events] == ["Long"]
+        
+        test_scheduler.update_event(3, start_time="2024-01-15T11:00:00")
+        events = test_scheduler.get_events_in_range(
+            datetime(2024, 1, 15, 10, 0), datetime(2024, 1, 15, 12, 0)
+        )
+        assert [event['title'] for event in events] == ["Long", "Afternoon"]
+
+class TestRecurrence:
+    """Test cases for lazily expanded recurring events"""
+    
+    def test_range_expands_occurrences(self, test_scheduler):
+        """Test that range queries include each occurrence of a recurring event"""
+        weekly = test_scheduler.add_event("Weekly", "Sync", "2024-01-01T10:00:00", "2024-01-01T11:00:00", "weekly")
+        single = test_scheduler.add_event("Single", "Once", "2024-01-10T09:00:00", "2024-01-10T10:00:00")
+        
+        events = test_scheduler.get_events_in_range(datetime(2024, 1, 1), datetime(2024, 1, 29))
+        assert [event['start_time'] for event in events] == [
+            "2024-01-01T10:00:00", "2024-01-08T10:00:00", "2024-01-10T09:00:00",
+            "2024-01-15T10:00:00", "2024-01-22T10:00:00"
+        ]
+        assert events[0] is weekly and events[2] is single
+        assert all(event['id'] == weekly['id'] for event in events if event is not single)
+        assert events[1]['end_timestamp'] - events[1]['start_timestamp'] == 3600
+        # An occurrence already in progress at the start of the window
+        events = test_scheduler.get_events_in_range(datetime(2024, 1, 15, 10, 30), datetime(2024, 1, 15, 12))
+        assert [event['start_time'] for event in events] == ["2024-01-15T10:00:00"]
+        assert len(test_scheduler.get_all_events()) == 2
+    
+    def test_monthly_skips_short_months(self, test_scheduler):
+        """Test that monthly events on the 31st skip months without one"""
+        test_scheduler.add_event("Month end", "Close", "2024-01-31T10:00:00", "2024-01-31T11:00:00", "monthly")
+        events = test_scheduler.get_events_in_range(datetime(2024, 1, 1), datetime(2024, 6, 1))
+        assert [event['start_time'][:10] for event in events] == ["2024-01-31", "2024-03-31", "2024-05-31"]
+    
+    def test_update_invalidates_occurrences(self, test_scheduler):
+        """Test that cached occurrences follow updates and deletes"""
+        event = test_scheduler.add_event("Daily", "Standup", "2024-01-01T09:00:00", "2024-01-01T09:15:00", "daily")
+        window = (datetime(2024, 1, 5), datetime(2024, 1, 7))
+        assert [e['start_time'] for e in test_scheduler.get_events_in_range(*window)] == \
+            ["2024-01-05T09:00:00", "2024-01-06T09:00:00"]
+        
+        test_scheduler.update_event(event['id'], start_time="2024-01-01T08:00:00", end_time="2024-01-01T08:15:00")
+        assert [e['start_time'] for e in test_scheduler.get_events_in_range(*window)] == \
+            ["2024-01-05T08:00:00", "2024-01-06T08:00:00"]
+        test_scheduler.update_event(event['id'], recurring="weekly")
+        assert test_scheduler.get_events_in_range(*window) == []
+        test_scheduler.delete_event(event['id'])
+        assert test_scheduler.get_events_in_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) == []
+    
+    def test_distant_window(self, test_scheduler):
+        """Test that a window far from the first start is expanded without walking the years before it"""
+        test_scheduler.add_event("Daily", "Standup", "2024-01-01T09:00:00", "2024-01-01T09:15:00", "daily")
+        test_scheduler.add_event("Month end", "Close", "2024-01-31T10:00:00", "2024-01-31T11:00:00", "monthly")
+        events = test_scheduler.get_events_in_range(datetime(2299, 4, 29), datetime(2299, 5, 2))
+        assert [event['start_time'] for event in events] == [
+            "2299-04-29T09:00:00", "2299-04-30T09:00:00", "2299-05-01T09:00:00"
+        ]
+        events = test_scheduler.get_events_in_range(datetime(2299, 12, 31), datetime(2300, 1, 1))
+        assert [event['start_time'] for event in events] == ["2299-12-31T09:00:00", "2299-12-31T10:00:00"]
+    
+    def test_skips_later_series(self, test_scheduler):
+        """Test that series starting after a window are not expanded for it"""
+        for year in range(2030, 2040):
+            test_scheduler.add_event(f"From {year}", "Later", f"{year}-01-01T09:00:00", f"{year}-01-01T10:00:00", "weekly")
+        test_scheduler.add_event("Now", "Earlier", "2024-01-01T09:00:00", "2024-01-01T10:00:00", "weekly")
+        
+        events = test_scheduler.get_events_in_range(datetime(2024, 1, 1), datetime(2024, 1, 10))
+        assert [event['title'] for event in events] == ["Now", "Now"]
+        assert test_scheduler.cache_metrics()['occurrences']['size'] == 2
+    
+    @pytest.mark.parametrize('snapshot_reads', [False, True])
+    def test_upcoming_occurrences(self, tmp_path, snapshot_reads):
+        """Test that upcoming events include the next occurrences of recurring events, in pages"""
+        recurring_scheduler = EventScheduler(events_file=str(tmp_path / 'events.json'), snapshot_reads=snapshot_reads)
+        now = datetime.now().replace(microsecond=0)
+        first = now - timedelta(days=3) + timedelta(minutes=30)
+        single_ids = []
+        for offset in (10, 20, 40):
+            start = now + timedelta(minutes=offset)
+            single_ids.append(recurring_scheduler.add_event(
+                f"Single {offset}", "Once", start.isoformat(), (start + timedelta(minutes=5)).isoformat())['id'])
+        daily = recurring_scheduler.add_event("Daily", "Standup", first.isoformat(),
+                                              (first + timedelta(minutes=15)).isoformat(), "daily")
+        
+        upcoming = recurring_scheduler.get_upcoming_events(1)
+        assert [event['id'] for event in upcoming] == single_ids[:2] + [daily['id']] + single_ids[2:]
+        assert upcoming[2]['start_time'] == (now + timedelta(minutes=30)).isoformat()
+        
+        page = recurring_scheduler.get_upcoming_events(1, limit=2)
+        last = page[-1]
+        rest = recurring_scheduler.get_upcoming_events(1, after=(last['start_timestamp'], last['id']))
+        assert [event['id'] for event in page + rest] == [event['id'] for event in upcoming]
+        # The next day's occurrence is further away than the window
+        assert len(recurring_scheduler.get_upcoming_events(24)) == 4
+        assert len(recurring_scheduler.get_upcoming_events(25)) == 5
+
+class TestReminderEngine:
+    """Test cases for the heap-based reminder engine"""
+    
+    @staticmethod
+    def local_time(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat()
+    
+    def add(self, test_scheduler, title, start):
+        return test_scheduler.add_event(title, "Reminder test", self.local_time(start), self.local_time(start + 1800))
+    
+    def test_fires_once_at_lead_time(self, test_scheduler):
+        """Test that each reminder fires once, when its event is within the lead time"""
+        engine = ReminderEngine(test_scheduler, notify=None, lead=3600)
+        now = time.time()
+        soon = self.add(test_scheduler, "Soon", now + 1800)
+        later = self.add(test_scheduler, "Later", now + 3 * 3600)
+        self.add(test_scheduler, "Past", now - 600)
+        
+        assert engine.due(now) == [soon]
+        assert engine.due(now) == []
+        assert engine.due(now + 2 * 3600 - 1) == []
+        assert engine.due(now + 2 * 3600 + 1) == [later]
+        assert engine.due(now + 4 * 3600) == []
+    
+    def test_follows_mutations(self, test_scheduler):
+        """Test that updates reschedule reminders and deletes cancel them"""
+        now = time.time()
+        moved = self.add(test_scheduler, "Moved", now + 3 * 3600)
+        cancelled = self.add(test_scheduler, "Cancelled", now + 3 * 3600)
+        engine = ReminderEngine(test_scheduler, notify=None, lead=3600)
+        
+        moved = test_scheduler.update_event(moved['id'], start_time=self.local_time(now + 5 * 3600))
+        test_scheduler.delete_event(cancelled['id'])
+        assert engine.due(now + 3 * 3600) == []
+        
+        renamed = test_scheduler.update_event(moved['id'], title="Renamed")
+        assert engine.due(now + 4 * 3600 + 1) == [renamed]
+        # Already reminded about this start time
+        test_scheduler.update_event(moved['id'], description="Edited")
+        assert engine.due(now + 5 * 3600) == []
+    
+    def test_recurring_reminders(self, test_scheduler):
+        """Test that a recurring event is reminded about once per occurrence"""
+        engine = ReminderEngine(test_scheduler, notify=None, lead=3600)
+        now = time.time()
+        self.add(test_scheduler, "Daily", now - 2 * 86400 + 1800)
+        event = test_scheduler.update_event(1, recurring="daily")
+        
+        first = engine.due(now)
+        assert [occurrence['id'] for occurrence in first] == [event['id']]
+        assert abs(first[0]['start_timestamp'] - (now + 1800)) < 1
+        assert engine.due(now) == []
+        test_scheduler.update_event(event['id'], title="Renamed")
+        assert engine.due(now + 1800) == []
+        second = engine.due(now + 86400)
+        assert second[0]['title'] == "Renamed"
+        assert abs(second[0]['start_timestamp'] - (now + 86400 + 1800)) < 1
+    
+    def test_forgets_past_reminders(self, test_scheduler):
+        """Test that fired reminders are only remembered until their event starts"""
+        engine = ReminderEngine(test_scheduler, notify=None, lead=3600)
+        now = time.time()
+        for i in range(10):
+            self.add(test_scheduler, f"Event {i}", now + 1800 + i)
+        assert len(engine.due(now)) == 10
+        assert len(engine._fired) == 10
+        assert engine.due(now + 1805.5) == []
+        assert len(engine._fired) == 4
+        assert engine.due(now + 3600) == []
+        assert engine._fired == {}
+    
+    def test_registers_under_the_lock(self, test_scheduler):
+        """Test that a mutation racing engine setup is neither lost nor applied twice"""
+        now = time.time()
+        stop = threading.Event()
+        
+        def writer():
+            while not stop.is_set():
+                event = self.add(test_scheduler, "Racing", now + 1800)
+                test_scheduler.delete_event(event['id'])
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            engines = [ReminderEngine(test_scheduler, notify=None, lead=3600) for _ in range(20)]
+        finally:
+            stop.set()
+            thread.join()
+        assert all(engine.due(now) == [] for engine in engines)
+        kept = self.add(test_scheduler, "Kept", now + 1800)
+        assert all(engine.due(now) == [kept] for engine in engines)
+    
+    def test_thread_wakes_for_new_reminder(self, test_scheduler):
+        """Test that the engine thread fires a reminder added while it sleeps"""
+        fired = []
+        done = threading.Event()
+        engine = ReminderEngine(test_scheduler, notify=lambda events: (fired.extend(events), done.set()), lead=3600)
+        engine.start()
+        try:
+            event = self.add(test_scheduler, "Imminent", time.time() + 3600.2)
+            assert done.wait(5)
+            assert fired == [event]
+        finally:
+            engine.stop()
+    
+    def test_thread_survives_far_future_reminder(self, test_scheduler):
+        """Test that a reminder further out than a thread can wait leaves the engine thread running"""
+        fired = []
+        done = threading.Event()
+        test_scheduler.add_event("Far Future", "Reminder test", "2400-01-01T10:00:00", "2400-01-01T11:00:00")
+        engine = ReminderEngine(test_scheduler, notify=lambda events: (fired.extend(events), done.set()), lead=3600)
+        engine.start()
+        try:
+            time.sleep(0.1)
+            assert engine._thread.is_alive()
+            event = self.add(test_scheduler, "Imminent", time.time() + 3600.2)
+            assert done.wait(5)
+            assert fired == [event]
+        finally:
+            engine.stop()
+
+class TestReminderDispatcher:
+    """Test cases for reminder delivery to sinks"""
+    
+    class RecordingSink(ReminderSink):
+        """Stand-in sink that records batches, optionally failing or stalling first"""
+        
+        def __init__(self, name, failures=0, delay=0):
+            self.name = name
+            self.failures = failures
+            self.delay = delay
+            self.batches = []
+        
+        def deliver(self, events):
+            time.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise IOError("sink unavailable")
+            self.batches.append([event['id'] for event in events])
+    
+    @staticmethod
+    def events(count):
+        return [{'id': i, 'title': f"Event {i}", 'start_timestamp': 1705312800.0} for i in range(1, count + 1)]
+    
+    def test_incomplete_sink(self):
+        """Test that a sink without deliver() cannot be created"""
+        class Nameless(ReminderSink):
+            name = 'nameless'
+        
+        with pytest.raises(TypeError):
+            Nameless()
+    
+    def test_batches_and_metrics(self):
+        """Test that reminders are delivered in batches and counted"""
+        sink = self.RecordingSink('recording', delay=0.05)
+        dispatcher = ReminderDispatcher([sink], workers=1, batch_size=4, backoff=0)
+        dispatcher.dispatch(self.events(1))
+        dispatcher.dispatch(self.events(10)[1:])
+        dispatcher.close()
+        
+        assert sorted(sum(sink.batches, [])) == list(range(1, 11))
+        assert max(len(batch) for batch in sink.batches) == 4
+        metrics = dispatcher.metrics()['recording']
+        assert metrics['queued'] == metrics['delivered'] == 10
+        assert metrics['queue_depth'] == 0
+        assert metrics['batches'] == len(sink.batches)
+        assert metrics['latency_max_ms'] >= metrics['latency_avg_ms'] > 0
+    
+    def test_retry_and_give_up(self):
+        """Test that failed batches are retried, then counted as failed"""
+        flaky = self.RecordingSink('flaky', failures=2)
+        broken = self.RecordingSink('broken', failures=100)
+        dispatcher = ReminderDispatcher([flaky, broken], workers=1, max_attempts=3, backoff=0.001)
+        dispatcher.dispatch(self.events(2))
+        dispatcher.close()
+        
+        metrics = dispatcher.metrics()
+        assert flaky.batches == [[1, 2]]
+        assert metrics['flaky']['retries'] == 2
+        assert metrics['flaky']['delivered'] == 2
+        assert metrics['broken']['retries'] == 2
+        assert metrics['broken']['failed'] == 2
+    
+    def test_slow_sink_does_not_delay_others(self):
+        """Test that a stalled sink neither delays other sinks nor grows without bound"""
+        stalled = self.RecordingSink('stalled')
+        fast = self.RecordingSink('fast')
+        delivering, release = threading.Event(), threading.Event()
+        stalled.deliver = lambda events: (delivering.set(), release.wait(5))
+        dispatcher = ReminderDispatcher([stalled, fast], workers=1, queue_size=2)
+        dispatcher.dispatch(self.events(1))
+        assert delivering.wait(5)
+        # The stalled worker holds event 1; its queue has room for two more
+        for event in self.events(4)[1:]:
+            dispatcher.dispatch([event])
+            for _ in range(100):
+                if event['id'] in sum(fast.batches, []):
+                    break
+                time.sleep(0.01)
+        assert sum(fast.batches, []) == [1, 2, 3, 4]
+        release.set()
+        dispatcher.close()
+        
+        metrics = dispatcher.metrics()
+        assert metrics['stalled']['dropped'] == 1
+        assert metrics['stalled']['delivered'] == 3
+        assert metrics['fast']['delivered'] == 4
+    
+    def test_log_file_sink(self, tmp_path):
+        """Test that the log file sink appends a line per reminder"""
+        path = str(tmp_path / 'reminders.log')
+        sink = LogFileSink(path)
+        sink.deliver(self.events(2))
+        sink.deliver(self.events(1))
+        with open(path) as file:
+            lines = file.read().splitlines()
+        assert len(lines) == 3
+        assert lines[0].endswith("REMINDER: Event 1 starts at " + datetime.fromtimestamp(1705312800).strftime('%H:%M'))
+    
+    def test_webhook_sink(self):
+        """Test that the webhook sink posts the batch as JSON"""
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        received = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(204)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            WebhookSink(f"http://127.0.0.1:{server.server_port}/hook").deliver(self.events(2))
+        finally:
+            thread.join()
+            server.server_close()
+        assert [event['id'] for event in received[0]['reminders']] == [1, 2]
+
+class TestEventStream:
+    """Test cases for the live change feed hub"""
+    
+    def add(self, test_scheduler, title):
+        return test_scheduler.add_event(title, "Streamed", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+    
+    def test_fan_out(self, test_scheduler):
+        """Test that every subscriber receives each mutation with its version"""
+        hub = EventStreamHub(test_scheduler)
+        first, second = hub.subscribe(), hub.subscribe()
+        event = self.add(test_scheduler, "Standup")
+        test_scheduler.delete_event(event['id'])
+        
+        for subscription in (first, second):
+            messages = parse_sse(''.join(subscription.get(1)))
+            assert [(kind, data['version']) for kind, data, _ in messages] == \
+                [('put', test_scheduler.version - 1), ('delete', test_scheduler.version)]
+            assert messages[0][1]['event']['title'] == "Standup"
+            assert messages[1][2] == f"{test_scheduler.instance_id}:{test_scheduler.version}"
+        
+        hub.unsubscribe(first)
+        self.add(test_scheduler, "Review")
+        assert first.get(0) == []
+        assert hub.metrics()['clients'] == 1
+    
+    def test_slow_subscriber_is_told_to_resync(self, test_scheduler):
+        """Test that a full buffer is replaced by one resync message"""
+        hub = EventStreamHub(test_scheduler, buffer_size=3)
+        subscription = hub.subscribe()
+        for i in range(5):
+            self.add(test_scheduler, f"Event {i}")
+        
+        messages = parse_sse(''.join(subscription.get(1)))
+        assert [kind for kind, _, _ in messages] == ['resync', 'put', 'put']
+        assert messages[-1][1]['event']['title'] == "Event 4"
+        assert hub.metrics()['resyncs'] == 1
+    
+    def test_catch_up(self, test_scheduler):
+        """Test that a reconnecting client is replayed what it missed, or told to reload"""
+        hub = EventStreamHub(test_scheduler)
+        last_seen = f"{test_scheduler.instance_id}:{test_scheduler.version}"
+        kept = self.add(test_scheduler, "Kept")
+        removed = self.add(test_scheduler, "Removed")
+        subscription = hub.subscribe()
+        test_scheduler.delete_event(removed['id'])
+        hub.catch_up(subscription, last_seen)
+        
+        messages = parse_sse(''.join(subscription.get(1)))
+        assert [(kind, data.get('id') or data['event']['id']) for kind, data, _ in messages] == \
+            [('put', kept['id']), ('delete', removed['id'])]
+        
+        for position in ("other:0", f"{test_scheduler.instance_id}:{test_scheduler.version + 1}"):
+            subscription = hub.subscribe()
+            hub.catch_up(subscription, position)
+            assert [kind for kind, _, _ in parse_sse(''.join(subscription.get(1)))] == ['resync']
+    
+    def test_stream_sink_publishes_reminders(self, test_scheduler):
+        """Test that reminders dispatched to the stream sink reach subscribers"""
+        hub = EventStreamHub(test_scheduler)
+        subscription = hub.subscribe()
+        StreamSink(hub).deliver([{'id': 7, 'title': "Standup"}])
+        assert parse_sse(''.join(subscription.get(1))) == [('reminder', {'events': [{'id': 7, 'title': "Standup"}]}, None)]
+
+class TestParseDatetime:
+    """Test cases for datetime parsing"""
+    
+    def test_iso_formats(self):
+        """Test the ISO 8601 formats sent by the web UI and clients"""
+        assert parse_datetime("2024-01-15T10:00") == datetime(2024, 1, 15, 10, 0)
+        assert parse_datetime("2024-01-15T10:00:00.5") == datetime(2024, 1, 15, 10, 0, 0, 500000)
+        assert parse_datetime("2024-01-15T10:00:00Z").timestamp() == 1705312800
+    
+    def test_fuzzy_fallback(self, monkeypatch):
+        """Test that non-ISO input only parses while the fallback is enabled"""
+        assert parse_datetime("January 15 2024 10am") == datetime(2024, 1, 15, 10, 0)
+        
+        monkeypatch.setattr(app_module, 'FUZZY_DATETIME_FALLBACK', False)
+        with pytest.raises(ValueError):
+            parse_datetime("January 15 2024 10am")
+
+class TestIntervalTree:
+    """Test cases for the interval index"""
+    
+    @pytest.mark.parametrize('bulk', [False, True])
+    def test_matches_linear_scan(self, bulk):
+        """Test overlap and start queries against a brute-force scan, for a tree built
+        by inserts or in bulk from sorted intervals"""
+        rng = random.Random(42)
+        tree = IntervalTree()
+        intervals = {}
+        for item_id in range(300):
+            start = rng.randint(0, 1000)
+            intervals[item_id] = (start, start + rng.randint(1, 100))
+            if not bulk:
+                tree.insert(intervals[item_id][0], intervals[item_id][1], item_id)
+        if bulk:
+            tree = IntervalTree.build([(start, end, item_id) for item_id, (start, end) in
+                                        sorted(intervals.items(), key=lambda item: (item[1][0], item[0]))])
+            # Still balanced enough to change afterwards
+            tree.insert(500, 520, 300)
+            intervals[300] = (500, 520)
+        for item_id in range(0, 300, 3):
+            tree.remove(intervals.pop(item_id)[0], item_id)
+        assert len(tree) == len(intervals)
+        
+        for _ in range(50):
+            low = rng.randint(0, 1100)
+            high = low + rng.randint(1, 200)
+            expected = sorted(
+                (start, item_id) for item_id, (start, end) in intervals.items()
+                if start < high and end > low
+            )
+            assert tree.overlapping(low, high) == [item_id for _, item_id in expected]
+            expected = sorted(
+                (start, item_id) for item_id, (start, end) in intervals.items()
+                if low <= start <= high
+            )
+            assert tree.starting_between(low, high) == [item_id for _, item_id in expected]
+    
+    def test_starting_between_paged(self):
+        """Test resuming start queries after a key with a limit"""
+        tree = IntervalTree()
+        for item_id, start in enumerate([5, 1, 3, 3, 8]):
+            tree.insert(start, start + 1, item_id)
+        
+        assert tree.starting_between(2, 8, limit=2) == [2, 3]
+        assert tree.starting_between(2, 8, after=(3, 3), limit=2) == [0, 4]
+
+class TestJournal:
+    """Test cases for journaled storage"""
+    
+    @pytest.fixture
+    def events_file(self, tmp_path):
+        return str(tmp_path / 'events.json')
+    
+    def test_journal_replay(self, events_file):
+        """Test that mutations are appended to the journal and replayed on load"""
+        journal_scheduler = EventScheduler(events_file=events_file, journal=True)
+        journal_scheduler.add_event("First", "First event", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        journal_scheduler.add_event("Second", "Second event", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        journal_scheduler.update_event(1, title="First Updated")
+        journal_scheduler.delete_event(2)
+        
+        assert not os.path.exists(events_file)
+        with open(journal_scheduler.storage.journal_file) as file:
+            assert len(file.readlines()) == 4
+        
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert len(reloaded.events) == 1
+        assert reloaded.events[0]['title'] == "First Updated"
+    
+    def test_journal_ignores_torn_record(self, events_file):
+        """Test that a partially written final record is skipped on replay"""
+        journal_scheduler = EventScheduler(events_file=events_file, journal=True)
+        journal_scheduler.add_event("Kept", "Kept event", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with open(journal_scheduler.storage.journal_file, 'a') as file:
+            file.write('{"op":"put","event":{"id":2,')
+        
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert [event['title'] for event in reloaded.events] == ["Kept"]
+    
+    def test_journal_compaction(self, events_file):
+        """Test that the journal is folded into the snapshot past the threshold"""
+        journal_scheduler = EventScheduler(events_file=events_file, journal=True, compact_threshold=3)
+        for i in range(5):
+            journal_scheduler.add_event(f"Event {i}", "Compaction", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        journal_scheduler.storage.wait_for_compaction()
+        
+        with open(events_file) as file:
+            assert len(json.load(file)['events']) == 3
+        with open(journal_scheduler.storage.journal_file) as file:
+            assert len(file.readlines()) == 2
+        
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert len(reloaded.events) == 5
+    
+    def test_backup_replays_compacted_journal(self, events_file):
+        """Test that falling back to the backup keeps mutations folded in by compaction"""
+        journal_scheduler = EventScheduler(events_file=events_file, journal=True, compact_threshold=3)
+        for i in range(8):
+            journal_scheduler.add_event(f"Event {i}", "Compaction", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+            journal_scheduler.storage.wait_for_compaction()
+        journal_scheduler.delete_event(1)
+        journal_scheduler.storage.wait_for_compaction()
+        assert os.path.exists(events_file + '.bak')
+        
+        with open(events_file, 'r+') as file:
+            file.truncate(100)
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert sorted(event['id'] for event in reloaded.events) == list(range(2, 9))
+        
+        # save() starts over without a journal, so the backup cannot be brought up to date
+        reloaded.save_events()
+        with open(events_file, 'r+') as file:
+            file.truncate(100)
+        with pytest.raises(CorruptSnapshotError):
+            EventScheduler(events_file=events_file, journal=True)
+
+class TestSnapshotRecovery:
+    """Test cases for checksummed snapshots and recovery from the backup"""
+    
+    @pytest.fixture
+    def events_file(self, tmp_path):
+        events_file = str(tmp_path / 'events.json')
+        first = EventScheduler(events_file=events_file)
+        first.add_event("Kept", "In the backup", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        first.add_event("Latest", "Only in the snapshot", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        return events_file
+    
+    def test_checksummed_snapshot(self, events_file):
+        """Test that snapshots carry a checksum and remain plain JSON"""
+        with open(events_file) as file:
+            text = file.read()
+        assert text.startswith('{"checksum": "')
+        document = json.loads(text)
+        assert document['next_id'] == 3
+        assert [event['title'] for event in document['events']] == ["Kept", "Latest"]
+        with open(events_file + '.bak') as file:
+            assert [event['title'] for event in json.load(file)['events']] == ["Kept"]
+    
+    def test_truncated_snapshot_falls_back(self, events_file):
+        """Test that a torn snapshot is replaced by the last good one"""
+        with open(events_file, 'r+') as file:
+            file.truncate(100)
+        assert [event['title'] for event in EventScheduler(events_file=events_file).events] == ["Kept"]
+    
+    def test_checksum_mismatch_falls_back(self, events_file):
+        """Test that a snapshot that parses but fails its checksum is not trusted"""
+        with open(events_file) as file:
+            text = file.read()
+        with open(events_file, 'w') as file:
+            file.write(text.replace('Only in the snapshot', 'Changed on the disk'))
+        assert [event['title'] for event in EventScheduler(events_file=events_file).events] == ["Kept"]
+    
+    @pytest.mark.parametrize('encoder', ['orjson', 'json'])
+    def test_encoders_round_trip(self, tmp_path, monkeypatch, encoder):
+        """Test that snapshots and journals written by either JSON encoder load back"""
+        if encoder == 'json':
+            monkeypatch.setattr(app_module, 'orjson', None)
+        elif app_module.orjson is None:
+            pytest.skip("orjson is not installed")
+        events_file = str(tmp_path / 'events.json')
+        for journal in (False, True):
+            first = EventScheduler(events_file=events_file, journal=journal)
+            first.add_event("Café ☕", "Grüße", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+            reloaded = EventScheduler(events_file=events_file, journal=journal)
+            assert reloaded.events == first.events
+    
+    def test_no_good_snapshot(self, events_file):
+        """Test that loading fails instead of starting empty when nothing is readable"""
+        for path in (events_file, events_file + '.bak'):
+            with open(path, 'w') as file:
+                file.write('{"events": [')
+        with pytest.raises(CorruptSnapshotError):
+            EventScheduler(events_file=events_file)
+
+class TestSQLiteStorage:
+    """Test cases for the SQLite storage backend"""
+    
+    @pytest.fixture
+    def db_file(self, tmp_path):
+        return str(tmp_path / 'events.db')
+    
+    def test_round_trip(self, db_file):
+        """Test that mutations are persisted and reloaded"""
+        sqlite_scheduler = EventScheduler(storage=SQLiteStorage(db_file))
+        sqlite_scheduler.add_event("First", "First event", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        sqlite_scheduler.add_event("Second", "Second event", "2024-01-15T12:00:00", "2024-01-15T13:00:00")
+        sqlite_scheduler.update_event(1, title="First Updated")
+        sqlite_scheduler.delete_event(2)
+        sqlite_scheduler.storage.close()
+        
+        reloaded = EventScheduler(storage=SQLiteStorage(db_file))
+        assert [event['title'] for event in reloaded.get_all_events()] == ["First Updated"]
+        assert reloaded.add_event("Third", "Third event", "2024-01-15T14:00:00", "2024-01-15T15:00:00")['id'] == 3
+        reloaded.storage.close()
+    
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
+        with pytest.raises(ValueError):
+            create_storage('csv')
+    
+    def test_incomplete_backend(self):
+        """Test that a backend missing part of the interface cannot be created"""
+        class LoadOnly(EventStorage):
+            def load(self):
+                return [], 1
+        
+        with pytest.raises(TypeError):
+            LoadOnly()
+
+class TestGroupCommit:
+    """Test cases for batched (group commit) persistence"""
+    
+    class RecordingStorage(JSONFileStorage):
+        """JSON storage that remembers the size of each committed batch"""
+        
+        def __init__(self, events_file):
+            super().__init__(events_file)
+            self.batches = []
+        
+        def commit(self, records, state):
+            self.batches.append(len(records))
+            super().commit(records, state)
+    
+    def test_burst_is_written_in_batches(self, tmp_path):
+        """Test that a burst of writes is persisted in a few batches"""
+        events_file = str(tmp_path / 'events.json')
+        inner = self.RecordingStorage(events_file)
+        grouped = EventScheduler(storage=GroupCommitStorage(inner, interval=60, max_records=40))
+        for i in range(100):
+            event = grouped.add_event(f"Event {i}", "Burst", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        grouped.update_event(event['id'], title="Last")
+        grouped.delete_event(1)
+        grouped.storage.flush()
+        
+        assert sum(inner.batches) == 102
+        # Only the final flush writes a batch smaller than max_records
+        assert all(size >= 40 for size in inner.batches[:-1])
+        assert len(inner.batches) <= 3
+        reloaded = EventScheduler(events_file=events_file)
+        assert len(reloaded.events) == 99
+        assert reloaded.get_event_by_id(100)['title'] == "Last"
+        grouped.storage.close()
+    
+    def test_interval_flush(self, tmp_path):
+        """Test that a lone write is persisted once the interval elapses"""
+        inner = self.RecordingStorage(str(tmp_path / 'events.json'))
+        grouped = EventScheduler(storage=GroupCommitStorage(inner, interval=0.01))
+        grouped.add_event("Lone", "Single write", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        for _ in range(200):
+            if inner.batches:
+                break
+            threading.Event().wait(0.01)
+        assert inner.batches == [1]
+        grouped.storage.close()
+    
+    def test_close_flushes(self, tmp_path):
+        """Test that closing writes queued records and refuses new ones"""
+        events_file = str(tmp_path / 'events.json')
+        storage = GroupCommitStorage(JSONFileStorage(events_file, journal=True), interval=60)
+        grouped = EventScheduler(storage=storage)
+        grouped.add_event("Queued", "Not yet written", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        storage.close()
+        
+        assert [event['title'] for event in EventScheduler(events_file=events_file, journal=True).events] == ["Queued"]
+        with pytest.raises(RuntimeError):
+            storage.commit([], None)
+    
+    class FailingStorage(RecordingStorage):
+        """Recording storage whose first few commits fail"""
+        
+        def __init__(self, events_file, failures):
+            super().__init__(events_file)
+            self.failures = failures
+        
+        def commit(self, records, state):
+            if self.failures:
+                self.failures -= 1
+                raise OSError("disk unavailable")
+            super().commit(records, state)
+    
+    def test_failing_storage(self, tmp_path):
+        """Test that failed batches are retried a bounded number of times"""
+        flaky = self.FailingStorage(str(tmp_path / 'flaky.json'), failures=2)
+        storage = GroupCommitStorage(flaky, interval=0.001)
+        EventScheduler(storage=storage).add_event("Retried", "", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        storage.flush()
+        assert flaky.batches == [1]
+        storage.close()
+        
+        broken = self.FailingStorage(str(tmp_path / 'broken.json'), failures=100)
+        storage = GroupCommitStorage(broken, interval=0.001, max_attempts=3)
+        EventScheduler(storage=storage).add_event("Lost", "", "2024-01-15T10:00:00", "2024-01-15T11:00:00")
+        with pytest.raises(RuntimeError, match="disk unavailable"):
+            storage.flush()
+        assert broken.failures == 97
+        with pytest.raises(RuntimeError):
+            storage.commit([], None)
+        with pytest.raises(RuntimeError):
+            storage.close()
+
+class TestSnapshotReads:
+    """Test cases for copy-on-write snapshot reads"""
+    
+    def test_matches_locked_reads(self, tmp_path, monkeypatch):
+        """Test that snapshot reads return the same results as locked reads"""
+        monkeypatch.setattr(app_module.EventSnapshot, 'CHUNK_SIZE', 4)
+        locked = EventScheduler(events_file=str(tmp_path / 'locked.json'))
+        snapshotted = EventScheduler(events_file=str(tmp_path / 'snapshot.json'), snapshot_reads=True)
+        rng = random.Random(1)
+        for i in range(200):
+            hour = rng.randrange(24)
+            description = rng.choice(["Planning", "Review", "Retro"])
+            for target in (locked, snapshotted):
+                target.add_event(f"Event {i}", description,
+                                 f"2024-01-15T{hour:02d}:00:00", f"2024-01-15T{hour:02d}:30:00")
+            if i % 4 == 0:
+                event_id = rng.randrange(1, i + 2)
+                for target in (locked, snapshotted):
+                    target.update_event(event_id, start_time=f"2024-01-16T{hour:02d}:00:00")
+            if i % 5 == 0:
+                event_id = rng.randrange(1, i + 2)
+                for target in (locked, snapshotted):
+                    target.delete_event(event_id)
+        
+        def ids(events):
+            return [event['id'] for event in events]
+        
+        assert ids(snapshotted.get_all_events()) == ids(locked.get_all_events())
+        start = locked.get_all_events()[50]['start_timestamp']
+        assert ids(snapshotted.iter_events_by_start(start=start, limit=30)) == \
+            ids(locked.iter_events_by_start(start=start, limit=30))
+        assert ids(snapshotted.search_events("review")) == ids(locked.search_events("review"))
+        assert ids(snapshotted.search_events("planning", rank='bm25')) == \
+            ids(locked.search_events("planning", rank='bm25'))
+        for event_id in range(1, 202):
+            expected = locked.get_event_by_id(event_id)
+            actual = snapshotted.get_event_by_id(event_id)
+            assert (actual and actual['start_time']) == (expected and expected['start_time'])
+    
+    def test_readers_keep_their_snapshot(self, tmp_path):
+        """Test that a write does not change a listing already in progress"""
+        shared = EventScheduler(events_file=str(tmp_path / 'events.json'), snapshot_reads=True)
+        first = shared.add_event("First", "Kept", "2024-01-15T09:00:00", "2024-01-15T10:00:00")
+        shared.add_event("Second", "Kept", "2024-01-15T11:00:00", "2024-01-15T12:00:00")
+        
+        listing = shared.iter_events_by_start()
+        assert next(listing)['title'] == "First"
+        shared.add_event("Third", "Added", "2024-01-15T13:00:00", "2024-01-15T14:00:00")
+        updated = shared.update_event(first['id'], title="Renamed")
+        assert [event['title'] for event in listing] == ["Second"]
+        
+        assert first['title'] == "First"
+        assert shared.get_event_by_id(first['id']) is updated
+        assert [event['title'] for event in shared.get_all_events()] == ["Renamed", "Second", "Third"]
+
+class TestConcurrency:
+    """Stress tests for concurrent readers and writers"""
+    
+    def test_reads_do_not_wait_for_storage(self, tmp_path):
+        """Test that locked reads are not held up by a slow storage commit"""
+        committing, release = threading.Event(), threading.Event()
+        
+        class SlowStorage(JSONFileStorage):
+            def commit(self, records, state):
+                committing.set()
+                release.wait(5)
+                super().commit(records, state)
+        
+        shared = EventScheduler(storage=SlowStorage(str(tmp_path / 'events.json')))
+        writer = threading.Thread(target=shared.add_event, args=(
+            "Slow Write", "Stuck in storage", "2024-01-15T10:00:00", "2024-01-15T11:00:00"))
+        writer.start()
+        try:
+            assert committing.wait(5)
+            started = time.monotonic()
+            assert [event['title'] for event in shared.search_events("slow")] == ["Slow Write"]
+            assert len(shared.get_events_in_range(datetime(2024, 1, 15), datetime(2024, 1, 16))) == 1
+            assert shared.suggest_titles("slo") == ["Slow Write"]
+            assert time.monotonic() - started < 1
+        finally:
+            release.set()
+            writer.join()
+        assert [event['title'] for event in EventScheduler(events_file=str(tmp_path / 'events.json')).events] == ["Slow Write"]
+    
+    @pytest.mark.parametrize('snapshot_reads', [False, True])
+    def test_concurrent_mutations_and_reads(self, tmp_path, snapshot_reads):
+        """Test that concurrent writers and readers leave the scheduler consistent"""
+        events_file = str(tmp_path / 'events.json')
+        shared = EventScheduler(events_file=events_file, journal=True, compact_threshold=50,
+                                snapshot_reads=snapshot_reads)
+        errors = []
+        
+        def writer(worker):
+            try:
+                for i in range(100):
+                    hour = 8 + (worker + i) % 10
+                    event = shared.add_event(f"Worker {worker} event {i}", "Stress test",
+                                             f"2024-01-15T{hour:02d}:00:00", f"2024-01-15T{hour:02d}:30:00")
+                    if i % 3 == 0:
+                        shared.update_event(event['id'], start_time=f"2024-01-16T{hour:02d}:00:00")
+                    if i % 5 == 0:
+                        assert shared.delete_event(event['id']) is True
+            except Exception as e:
+                errors.append(e)
+        
+        def reader():
+            try:
+                for _ in range(100):
+                    events = shared.get_all_events()
+                    assert len(set(event['id'] for event in events)) == len(events)
+                    shared.search_events("worker")
+                    shared.get_upcoming_events(24)
+                    list(shared.iter_events_by_start(limit=10))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        shared.storage.wait_for_compaction()
+        
+        assert errors == []
+        events = shared.get_all_events()
+        assert len(events) == 4 * 80
+        assert sorted(event['id'] for event in events) == sorted(set(event['id'] for event in events))
+        assert len(shared.search_events("stress")) == len(events)
+        
+        reloaded = EventScheduler(events_file=events_file, journal=True)
+        assert sorted(event['id'] for event in reloaded.events) == sorted(event['id'] for event in events)
 
 class TestAPIEndpoints:
     """Test cases for API endpoints"""
@@ -198,6 +1390,28 @@ class TestAPIEndpoints:
         assert data['success'] is True
         assert data['status'] == 'healthy'
     
+    def test_metrics(self, client):
+        """Test the reminder delivery metrics endpoint"""
+        response = client.get('/api/metrics')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert data['success'] is True
+        assert 'queue_depth' in data['reminders']['console']
+        assert set(data['caches']) == {'queries', 'occurrences', 'fragments'}
+        assert 'evictions' in data['caches']['queries']
+    
+    def test_metrics_error(self, client, monkeypatch):
+        """Test that a failing metrics source is reported as an error"""
+        def broken():
+            raise RuntimeError("metrics unavailable")
+        monkeypatch.setattr(app_module.dispatcher, 'metrics', broken)
+        response = client.get('/api/metrics')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 500
+        assert data == {'success': False, 'error': "metrics unavailable"}
+    
     def test_create_event(self, client):
         """Test creating an event via API"""
         # Clear events before test
@@ -258,6 +1472,70 @@ class TestAPIEndpoints:
         assert response.status_code == 400
         assert data['success'] is False
         assert 'Invalid datetime format' in data['error']
+        
+        # A naive time at the edge of the datetime range has no timestamp
+        event_data['start_time'] = '0001-01-01T00:00:00'
+        response = client.post('/api/events', data=json.dumps(event_data), content_type='application/json')
+        assert response.status_code == 400
+        response = client.put('/api/events/1', data=json.dumps({'start_time': '0001-01-01T00:00:00'}),
+                              content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_create_event_non_string_text(self, client):
+        """Test that a title or description that is not a string is rejected and leaves nothing behind"""
+        clear_events()
+        
+        for changes in ({'title': 123}, {'description': None}, {'title': ['Listed']}):
+            event_data = {
+                'title': 'Typed Event',
+                'description': 'Event with a typed field',
+                'start_time': '2024-01-15T10:00:00',
+                'end_time': '2024-01-15T11:00:00',
+                **changes
+            }
+            response = client.post('/api/events', data=json.dumps(event_data), content_type='application/json')
+            assert response.status_code == 400
+            assert 'must be a string' in json.loads(response.data)['error']
+        assert scheduler.events == []
+        
+        response = client.post('/api/events', data=json.dumps({
+            'title': 'Typed Event', 'description': 'Valid', 'start_time': '2024-01-15T10:00:00',
+            'end_time': '2024-01-15T11:00:00'
+        }), content_type='application/json')
+        event_id = json.loads(response.data)['event']['id']
+        response = client.put(f'/api/events/{event_id}', data=json.dumps({'title': 123}),
+                              content_type='application/json')
+        assert response.status_code == 400
+        assert json.loads(client.get(f'/api/events/{event_id}').data)['event']['title'] == 'Typed Event'
+        assert client.delete(f'/api/events/{event_id}').status_code == 200
+    
+    def test_create_event_invalid_recurring(self, client):
+        """Test that a recurring value other than a frequency or null is rejected and leaves nothing behind"""
+        clear_events()
+        
+        for recurring in (['daily'], 'yearly', 1, {'every': 'day'}):
+            event_data = {
+                'title': 'Repeating Event',
+                'description': 'Event with an unknown recurrence',
+                'start_time': '2024-01-15T10:00:00',
+                'end_time': '2024-01-15T11:00:00',
+                'recurring': recurring
+            }
+            response = client.post('/api/events', data=json.dumps(event_data), content_type='application/json')
+            assert response.status_code == 400
+            assert 'recurring must be one of' in json.loads(response.data)['error']
+        assert scheduler.events == []
+        
+        response = client.post('/api/events', data=json.dumps({
+            'title': 'Repeating Event', 'description': 'Valid', 'start_time': '2024-01-15T10:00:00',
+            'end_time': '2024-01-15T11:00:00', 'recurring': 'daily'
+        }), content_type='application/json')
+        event_id = json.loads(response.data)['event']['id']
+        response = client.put(f'/api/events/{event_id}', data=json.dumps({'recurring': ['weekly']}),
+                              content_type='application/json')
+        assert response.status_code == 400
+        assert json.loads(client.get(f'/api/events/{event_id}').data)['event']['recurring'] == 'daily'
+        assert client.delete(f'/api/events/{event_id}').status_code == 200
     
     def test_create_event_end_before_start(self, client):
         """Test creating an event where end time is before start time"""
@@ -292,6 +1570,248 @@ class TestAPIEndpoints:
         assert data['success'] is True
         assert 'events' in data
     
+    def test_get_events_paginated(self, client):
+        """Test cursor pagination on the event list"""
+        # Clear events before test
+        clear_events()
+        
+        for hour in range(10, 15):
+            client.post('/api/events',
+                       data=json.dumps({
+                           'title': f'Event at {hour}',
+                           'description': 'Paged event',
+                           'start_time': f'2024-01-15T{hour}:00:00',
+                           'end_time': f'2024-01-15T{hour}:30:00'
+                       }),
+                       content_type='application/json')
+        
+        titles = []
+        url = '/api/events?limit=2'
+        while True:
+            data = json.loads(client.get(url).data)
+            assert data['success'] is True
+            assert len(data['events']) <= 2
+            titles.extend(event['title'] for event in data['events'])
+            if not data['next_cursor']:
+                break
+            url = f"/api/events?limit=2&cursor={data['next_cursor']}"
+        assert titles == [f'Event at {hour}' for hour in range(10, 15)]
+        
+        response = client.get('/api/events?limit=2&cursor=not-a-cursor')
+        assert response.status_code == 400
+        response = client.get('/api/events?limit=0')
+        assert response.status_code == 400
+    
+    def test_search_events_paginated(self, client):
+        """Test cursor pagination on search results"""
+        # Clear events before test
+        clear_events()
+        
+        for hour in (14, 10, 12):
+            client.post('/api/events',
+                       data=json.dumps({
+                           'title': f'Standup {hour}',
+                           'description': 'Daily standup',
+                           'start_time': f'2024-01-15T{hour}:00:00',
+                           'end_time': f'2024-01-15T{hour}:15:00'
+                       }),
+                       content_type='application/json')
+        
+        data = json.loads(client.get('/api/events/search?q=standup&limit=2').data)
+        assert [event['title'] for event in data['events']] == ['Standup 10', 'Standup 12']
+        
+        data = json.loads(client.get(f"/api/events/search?q=standup&limit=2&cursor={data['next_cursor']}").data)
+        assert [event['title'] for event in data['events']] == ['Standup 14']
+        assert data['next_cursor'] is None
+    
+    def test_get_events_streaming(self, client):
+        """Test streamed JSON and NDJSON list responses"""
+        # Clear events before test
+        clear_events()
+        
+        for hour in (11, 10):
+            client.post('/api/events',
+                       data=json.dumps({
+                           'title': f'Event at {hour}',
+                           'description': 'Streamed event',
+                           'start_time': f'2024-01-15T{hour}:00:00',
+                           'end_time': f'2024-01-15T{hour}:30:00'
+                       }),
+                       content_type='application/json')
+        
+        response = client.get('/api/events')
+        assert response.is_streamed
+        data = json.loads(response.data)
+        assert [event['title'] for event in data['events']] == ['Event at 10', 'Event at 11']
+        
+        response = client.get('/api/events', headers={'Accept': 'application/x-ndjson'})
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode().splitlines()
+        assert [json.loads(line)['title'] for line in lines] == ['Event at 10', 'Event at 11']
+        
+        response = client.get('/api/events/upcoming?hours=1', headers={'Accept': 'application/x-ndjson'})
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.data == b''
+    
+    def test_streaming_error(self, client, monkeypatch):
+        """Test that an error partway through a streamed list still ends in valid JSON"""
+        clear_events()
+        event = scheduler.add_event('First', 'Streamed', '2024-01-15T10:00:00', '2024-01-15T11:00:00')
+        
+        def failing_iter(*args, **kwargs):
+            yield event
+            raise RuntimeError('storage went away')
+        monkeypatch.setattr(scheduler, 'iter_events_by_start', failing_iter)
+        
+        data = json.loads(client.get('/api/events').data)
+        assert data['success'] is False
+        assert data['error'] == 'storage went away'
+        assert [item['id'] for item in data['events']] == [event['id']]
+        
+        lines = client.get('/api/events', headers={'Accept': 'application/x-ndjson'}).data.decode().splitlines()
+        assert json.loads(lines[-1]) == {'success': False, 'error': 'storage went away'}
+    
+    def test_bulk_operations(self, client):
+        """Test creating, updating and deleting events in one bulk request"""
+        clear_events()
+        existing = json.loads(client.post('/api/events', data=json.dumps({
+            'title': 'Existing', 'description': 'Before', 'start_time': '2024-01-15T08:00:00',
+            'end_time': '2024-01-15T09:00:00'
+        }), content_type='application/json').data)['event']
+        
+        operations = [
+            {'title': 'Imported', 'description': 'Bulk', 'start_time': '2024-01-15T10:00:00',
+             'end_time': '2024-01-15T11:00:00'},
+            {'op': 'update', 'id': existing['id'], 'title': 'Renamed'},
+            {'op': 'create', 'title': 'Invalid', 'description': 'Bulk', 'start_time': '2024-01-15T10:00:00',
+             'end_time': '2024-01-15T09:00:00'},
+            {'op': 'delete', 'id': 12345},
+            {'op': 'delete', 'id': existing['id']},
+            {'op': 'move'},
+        ]
+        response = client.post('/api/events/bulk', data=json.dumps(operations), content_type='application/json')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert [result['status'] for result in data['results']] == [201, 200, 400, 404, 200, 400]
+        assert data['results'][0]['event']['title'] == 'Imported'
+        assert data['results'][1]['event']['title'] == 'Renamed'
+        assert data['results'][2]['error'] == 'End time must be after start time'
+        assert data['results'][4]['id'] == existing['id']
+        events = json.loads(client.get('/api/events').data)['events']
+        assert [event['title'] for event in events] == ['Imported']
+    
+    def test_bulk_ndjson(self, client):
+        """Test bulk operations sent as newline-delimited JSON"""
+        clear_events()
+        lines = [json.dumps({'title': f'Event {i}', 'description': 'Streamed', 'start_time': f'2024-01-15T{i + 10}:00:00',
+                             'end_time': f'2024-01-15T{i + 10}:30:00'}) for i in range(3)]
+        response = client.post('/api/events/bulk', data='\n'.join(lines) + '\n',
+                               content_type='application/x-ndjson')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert all(result['success'] for result in data['results'])
+        assert len(json.loads(client.get('/api/events').data)['events']) == 3
+    
+    def test_bulk_invalid_body(self, client, monkeypatch):
+        """Test that malformed or oversized bulk requests are rejected"""
+        response = client.post('/api/events/bulk', data='{"title": "Not a list"}', content_type='application/json')
+        assert response.status_code == 400
+        response = client.post('/api/events/bulk', data='{"op": "delete"\n', content_type='application/x-ndjson')
+        assert response.status_code == 400
+        
+        monkeypatch.setattr(app_module, 'BULK_MAX_OPERATIONS', 2)
+        response = client.post('/api/events/bulk', data=json.dumps([{'op': 'delete', 'id': 1}] * 3),
+                               content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_conditional_get(self, client):
+        """Test that unchanged list, search and upcoming responses are answered with 304"""
+        clear_events()
+        start = datetime.now() + timedelta(minutes=30)
+        created = client.post('/api/events', data=json.dumps({
+            'title': 'Polled', 'description': 'Dashboard', 'start_time': start.isoformat(),
+            'end_time': (start + timedelta(hours=1)).isoformat()
+        }), content_type='application/json')
+        event_id = json.loads(created.data)['event']['id']
+        
+        for url in ['/api/events', '/api/events?limit=5', '/api/events/search?q=polled', '/api/events/upcoming']:
+            response = client.get(url)
+            etag = response.headers['ETag']
+            assert response.status_code == 200
+            assert 'Accept' in response.headers['Vary']
+            
+            response = client.get(url, headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.data == b''
+            assert response.headers['ETag'] == etag
+            
+            ndjson = client.get(url, headers={'If-None-Match': etag, 'Accept': 'application/x-ndjson'})
+            assert ndjson.status_code == 200
+            assert ndjson.headers['ETag'] != etag
+        
+        etag = client.get('/api/events').headers['ETag']
+        client.put(f'/api/events/{event_id}', data=json.dumps({'title': 'Changed'}), content_type='application/json')
+        response = client.get('/api/events', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['events'][0]['title'] == 'Changed'
+    
+    def test_changes_endpoint(self, client):
+        """Test delta sync from the version of a full listing"""
+        clear_events()
+        response = client.get('/api/events')
+        since = int(response.headers['X-Store-Version'])
+        instance = response.headers['X-Store-Instance']
+        
+        created = []
+        for title in ['Kept', 'Removed']:
+            created.append(json.loads(client.post('/api/events', data=json.dumps({
+                'title': title, 'description': 'Synced', 'start_time': '2024-01-15T10:00:00',
+                'end_time': '2024-01-15T11:00:00'
+            }), content_type='application/json').data)['event'])
+        client.delete(f"/api/events/{created[1]['id']}")
+        
+        response = client.get(f'/api/events/changes?since={since}&instance={instance}')
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert data['version'] == since + 3
+        assert [(change['op'], change.get('id') or change['event']['id']) for change in data['changes']] == \
+            [('put', created[0]['id']), ('delete', created[1]['id'])]
+        
+        response = client.get(f"/api/events/changes?since={data['version']}")
+        assert json.loads(response.data)['changes'] == []
+        assert client.get(f'/api/events/changes?since={since}&instance=other').status_code == 410
+        assert client.get(f"/api/events/changes?since={data['version'] + 1}").status_code == 410
+        assert client.get('/api/events/changes').status_code == 400
+    
+    def test_event_stream(self, client):
+        """Test that the stream pushes changes made through the API"""
+        clear_events()
+        response = client.get('/api/events/stream', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b': connected')
+        
+        event = json.loads(client.post('/api/events', data=json.dumps({
+            'title': 'Live', 'description': 'Streamed', 'start_time': '2024-01-15T10:00:00',
+            'end_time': '2024-01-15T11:00:00'
+        }), content_type='application/json').data)['event']
+        kind, data, message_id = parse_sse(next(chunks).decode())[0]
+        assert (kind, data['event']) == ('put', event)
+        assert json.loads(client.get('/api/metrics').data)['stream']['clients'] == 1
+        response.close()
+        assert json.loads(client.get('/api/metrics').data)['stream']['clients'] == 0
+        
+        # A reconnecting client is caught up from its last message id
+        client.delete(f"/api/events/{event['id']}")
+        response = client.get('/api/events/stream', headers={'Last-Event-ID': message_id}, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+        assert parse_sse(next(chunks).decode())[0][:2] == ('delete', {'version': scheduler.version, 'id': event['id']})
+        response.close()
+    
     def test_get_event_by_id(self, client):
         """Test getting a specific event by ID"""
         # Clear events before test
@@ -437,6 +1957,53 @@ class TestAPIEndpoints:
         assert data['success'] is False
         assert 'Search query is required' in data['error']
     
+    def test_search_events_ranked(self, client):
+        """Test BM25 ranked search with a limit via API"""
+        # Clear events before test
+        clear_events()
+        
+        for title, description in [('Python Meeting', 'Weekly sync'), ('Python Workshop', 'Python, Python and more Python')]:
+            client.post('/api/events',
+                       data=json.dumps({
+                           'title': title,
+                           'description': description,
+                           'start_time': '2024-01-15T10:00:00',
+                           'end_time': '2024-01-15T11:00:00'
+                       }),
+                       content_type='application/json')
+        
+        response = client.get('/api/events/search?q=python&rank=bm25&limit=1')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert [event['title'] for event in data['events']] == ['Python Workshop']
+        
+        response = client.get('/api/events/search?q=python&rank=random')
+        assert response.status_code == 400
+    
+    def test_suggest_events(self, client):
+        """Test title suggestions via API"""
+        # Clear events before test
+        clear_events()
+        
+        client.post('/api/events',
+                   data=json.dumps({
+                       'title': 'Design Review',
+                       'description': 'Review mockups',
+                       'start_time': '2024-01-15T10:00:00',
+                       'end_time': '2024-01-15T11:00:00'
+                   }),
+                   content_type='application/json')
+        
+        response = client.get('/api/events/suggest?prefix=rev')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert data['suggestions'] == ['Design Review']
+        
+        response = client.get('/api/events/suggest')
+        assert response.status_code == 400
+    
     def test_get_upcoming_events(self, client):
         """Test getting upcoming events"""
         # Clear events before test
@@ -449,5 +2016,54 @@ class TestAPIEndpoints:
         assert data['success'] is True
         assert 'events' in data
 
+    def test_get_events_in_range(self, client):
+        """Test getting events overlapping a time window via API"""
+        # Clear events before test
+        clear_events()
+        
+        event_data = {
+            'title': 'Range Event',
+            'description': 'Event inside the window',
+            'start_time': '2024-01-15T10:00:00',
+            'end_time': '2024-01-15T11:00:00'
+        }
+        client.post('/api/events',
+                   data=json.dumps(event_data),
+                   content_type='application/json')
+        
+        response = client.get('/api/events/range?start=2024-01-15T10:30:00&end=2024-01-15T12:00:00')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert data['success'] is True
+        assert [event['title'] for event in data['events']] == ['Range Event']
+        
+        response = client.get('/api/events/range?start=2024-01-15T10:30:00')
+        assert response.status_code == 400
+        
+        # A UTC offset on one end only is compared by timestamp
+        response = client.get('/api/events/range?start=2024-01-15T10:00:00Z&end=2024-01-14T12:00:00')
+        assert response.status_code == 400
+        response = client.get('/api/events/range?start=2024-01-14T10:00:00Z&end=2024-01-16T12:00:00')
+        assert [event['title'] for event in json.loads(response.data)['events']] == ['Range Event']
+        
+        # Windows are capped, as recurring events are expanded over all of them
+        response = client.get('/api/events/range?start=2024-01-01T00:00:00&end=2300-01-01T00:00:00')
+        assert response.status_code == 400
+        
+        # Naive times at the edges of the datetime range
+        response = client.get('/api/events/range?start=0001-01-01T00:00:00&end=0001-01-02T00:00:00')
+        assert response.status_code == 400
+        client.post('/api/events', data=json.dumps({
+            'title': 'Last Days', 'description': 'Near the end of the range', 'recurring': 'daily',
+            'start_time': '9999-12-28T10:00:00', 'end_time': '9999-12-28T11:00:00'
+        }), content_type='application/json')
+        response = client.get('/api/events/range?start=9999-12-30T00:00:00&end=9999-12-31T23:59:59')
+        assert response.status_code == 200
+        assert [event['start_time'] for event in json.loads(response.data)['events']] == \
+            ['9999-12-30T10:00:00', '9999-12-31T10:00:00']
+        response = client.get('/api/events/upcoming?hours=100000')
+        assert response.status_code == 400
+
 if __name__ == '__main__':
     pytest.main([__file__]) 
\ No newline at end of file